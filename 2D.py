@@ -1,103 +1,167 @@
 import pygame
 import numpy as np
 import time
+from functools import lru_cache
 
-# Initialize pygame
-pygame.init()
+from engine import Profiler, Recorder, StatsCollector, make_simulation
 
 # Screen dimensions
 WIDTH, HEIGHT = 800, 600
 CELL_SIZE = 10
 COLS, ROWS = WIDTH // CELL_SIZE, HEIGHT // CELL_SIZE
 
+# Simulation: engine backend, rule and the share of cells alive at the start
+BACKEND = 'dense'
+RULE = 'B3/S23'
+DENSITY = 0.5
+SEED = None
+
+# Path to record the run to for replay.py, e.g. 'run_2d.rec'
+RECORD = None
+
+# Instrumentation: I shows timings on screen (turning the timers on if
+# PROFILE is off), O runs cProfile for PROFILE_FRAMES frames, D dumps the
+# recent frame samples
+PROFILE = False
+PROFILE_FRAMES = 100
+PROFILE_STATS = 'profile_2d.prof'
+PROFILE_DUMP = 'profile_2d.json'
+
 # Colors
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
 GRAY = (128, 128, 128)
 
-# Create screen
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Conway's Game of Life")
-
 def create_grid():
-    """Initialize a random grid"""
-    return np.random.choice([0, 1], size=(ROWS, COLS))
-
-def count_neighbors(grid, row, col):
-    """Count live neighbors with wrap-around boundaries"""
-    count = 0
-    for i in range(-1, 2):
-        for j in range(-1, 2):
-            if i == 0 and j == 0:
-                continue
-            # Wrap around edges
-            r = (row + i) % ROWS
-            c = (col + j) % COLS
-            count += grid[r][c]
-    return count
-
-def update_grid(grid):
-    """Apply Conway's Game of Life rules"""
-    new_grid = grid.copy()
-    for row in range(ROWS):
-        for col in range(COLS):
-            neighbors = count_neighbors(grid, row, col)
-            
-            # Apply rules
-            if grid[row][col] == 1:  # Live cell
-                if neighbors < 2 or neighbors > 3:
-                    new_grid[row][col] = 0
-            else:  # Dead cell
-                if neighbors == 3:
-                    new_grid[row][col] = 1
-    return new_grid
-
-def draw_grid(grid):
-    """Render the grid to the screen"""
-    screen.fill(BLACK)
-    for row in range(ROWS):
-        for col in range(COLS):
-            if grid[row][col] == 1:
-                pygame.draw.rect(screen, WHITE, 
-                                (col * CELL_SIZE, row * CELL_SIZE, 
-                                 CELL_SIZE - 1, CELL_SIZE - 1))
+    """Initialize a random grid with wrap-around boundaries"""
+    simulation = make_simulation(BACKEND, (ROWS, COLS), RULE, wrap=True, seed=SEED)
+    simulation.randomize(DENSITY)
+    return simulation
+
+def update_grid(simulation):
+    """Apply the rule for one generation"""
+    simulation.step()
+    return simulation
+
+@lru_cache(maxsize=None)
+def overlay_font():
+    return pygame.font.SysFont('Arial', 16)
+
+def draw_cells(surface, cells, color):
+    """Paint the cells at the given flat indices, inside the grid lines so
+    repainting a cell never draws over them"""
+    rows, cols = np.divmod(cells, COLS)
+    for row, col in zip(rows.tolist(), cols.tolist()):
+        pygame.draw.rect(surface, color, 
+                        (col * CELL_SIZE + 1, row * CELL_SIZE + 1, 
+                         CELL_SIZE - 2, CELL_SIZE - 2))
+
+def paint_board(surface, grid):
+    """Draw every live cell and the grid lines onto a blank surface"""
+    surface.fill(BLACK)
+    draw_cells(surface, np.flatnonzero(grid == 1), WHITE)
     
     # Draw grid lines
     for x in range(0, WIDTH, CELL_SIZE):
-        pygame.draw.line(screen, GRAY, (x, 0), (x, HEIGHT), 1)
+        pygame.draw.line(surface, GRAY, (x, 0), (x, HEIGHT), 1)
     for y in range(0, HEIGHT, CELL_SIZE):
-        pygame.draw.line(screen, GRAY, (0, y), (WIDTH, y), 1)
-    
+        pygame.draw.line(surface, GRAY, (0, y), (WIDTH, y), 1)
+
+def show(screen, board, overlay=()):
+    """Put the board on screen, with optional lines of overlay text"""
+    if board is not screen:
+        screen.blit(board, (0, 0))
+    for i, line in enumerate(overlay):
+        screen.blit(overlay_font().render(line, True, WHITE, BLACK), (10, 10 + i * 20))
     pygame.display.flip()
 
+def draw_grid(screen, grid, overlay=()):
+    """Render the whole grid to the screen, with optional lines of overlay text"""
+    paint_board(screen, grid)
+    show(screen, screen, overlay)
+
+class BoardView:
+    """Keeps the painted board between frames and repaints only the cells
+    born or died since, falling back to a full repaint after edits"""
+    def __init__(self, screen):
+        self.screen = screen
+        self.board = pygame.Surface(screen.get_size())
+        self.stamp = None
+
+    def draw(self, simulation, overlay=()):
+        if simulation.delta_applies(self.stamp):
+            draw_cells(self.board, simulation.births, WHITE)
+            draw_cells(self.board, simulation.deaths, BLACK)
+        elif self.stamp != simulation.stamp:
+            paint_board(self.board, simulation.state)
+        self.stamp = simulation.stamp
+        show(self.screen, self.board, overlay)
+
 def main():
-    grid = create_grid()
+    # Initialize pygame and create screen
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Conway's Game of Life")
+    
+    simulation = create_grid()
+    view = BoardView(screen)
+    stats = StatsCollector(simulation, region=None)
+    recorder = Recorder(RECORD, simulation) if RECORD else None
+    profiler = Profiler(enabled=PROFILE)
+    overlay = False
     running = True
     paused = False
     
     while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    paused = not paused
-                if event.key == pygame.K_r:
-                    grid = create_grid()
-                if event.key == pygame.K_c:
-                    grid = np.zeros((ROWS, COLS))
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                pos = pygame.mouse.get_pos()
-                col, row = pos[0] // CELL_SIZE, pos[1] // CELL_SIZE
-                grid[row][col] = 1 - grid[row][col]  # Toggle cell state
+        with profiler.timer('input'):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_SPACE:
+                        paused = not paused
+                    if event.key == pygame.K_r:
+                        simulation.randomize(DENSITY)
+                    if event.key == pygame.K_c:
+                        simulation.clear()
+                    if event.key == pygame.K_i:
+                        overlay = not overlay
+                        profiler.enabled = overlay or PROFILE
+                    if event.key == pygame.K_o:
+                        profiler.profile_frames(PROFILE_FRAMES, PROFILE_STATS)
+                    if event.key == pygame.K_d:
+                        profiler.dump(PROFILE_DUMP)
+                if event.type == pygame.MOUSEBUTTONDOWN:
+                    pos = pygame.mouse.get_pos()
+                    col, row = pos[0] // CELL_SIZE, pos[1] // CELL_SIZE
+                    simulation.toggle((row, col))  # Toggle cell state
         
         if not paused:
-            grid = update_grid(grid)
+            with profiler.timer('step'):
+                update_grid(simulation)
+        
+        if recorder:
+            with profiler.timer('record'):
+                recorder.capture()
+        
+        with profiler.timer('render'):
+            sample = stats.sample()
+            pygame.display.set_caption(f"Conway's Game of Life - generation {sample['generation']}, "
+                                       f"{sample['population']} live")
+            view.draw(simulation, profiler.summary_lines() if overlay else ())
         
-        draw_grid(grid)
+        if profiler.enabled:
+            profiler.count('live', simulation.population)
+            profiler.count('changed', simulation.changed)
+            if hasattr(simulation, 'active_chunks'):
+                profiler.count('active chunks', simulation.active_chunks)
+        profiler.end_frame()
         time.sleep(0.1)  # Control simulation speed
     
+    if recorder:
+        recorder.close()
+        print(f"Recorded {recorder.frames} frames to {RECORD}, {recorder.bytes_per_frame:.0f} bytes per frame")
     pygame.quit()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
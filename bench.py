@@ -0,0 +1,324 @@
+"""Benchmarks for the simulation steps and renderers
+
+    python bench.py run --output results.json       # full matrix
+    python bench.py run --quick --filter life2d     # a few small cases
+    python bench.py compare baseline.json results.json --threshold 0.1
+    python bench.py threads --size 2048             # sandbox thread scaling
+    python bench.py record --generations 1000       # recording size and seek speed
+    python bench.py allocs                          # check dense steps allocate nothing
+
+Each case reports cells per second, per-frame latency percentiles and the
+peak memory allocated during one frame. compare exits with status 1 when a
+case got slower than the threshold allows.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from cell import CellularAutomaton
+from engine import BACKENDS, Recorder, Replay, make_simulation
+
+def time_frames(step, frames):
+    """Run step() for a number of frames and return the mean seconds per frame"""
+    step()  # Warm up caches and the thread pool
+    start = time.perf_counter()
+    for _ in range(frames):
+        step()
+    return (time.perf_counter() - start) / frames
+
+def measure(step, frames):
+    """Per-frame latencies in seconds, and the peak bytes allocated by one more frame"""
+    step()  # Warm up
+    latencies = np.empty(frames)
+    for i in range(frames):
+        start = time.perf_counter()
+        step()
+        latencies[i] = time.perf_counter() - start
+    
+    # Tracing slows allocation down, so it gets a frame of its own
+    tracemalloc.start()
+    step()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return latencies, peak
+
+def life_case(backend, shape, rule, density):
+    def setup():
+        simulation = make_simulation(backend, shape, rule, wrap=len(shape) == 2, seed=0)
+        simulation.randomize(density)
+        return simulation.step
+    return setup
+
+def sandbox_case(size, threads):
+    def setup():
+        return CellularAutomaton(size, size, seed=0, threads=threads).update
+    return setup
+
+def sandbox_render_case(size, delta=False):
+    def setup():
+        automaton = CellularAutomaton(size, size, seed=0)
+        def render():
+            if delta:
+                # The cost of following one step's change set
+                automaton.image_stamp = (automaton.generation - 1, automaton.edits)
+            else:
+                automaton.image_stamp = None
+            return automaton.render()
+        automaton.step()
+        automaton.render()
+        return render
+    return setup
+
+def draw_grid_case(density):
+    def setup():
+        # Render into an offscreen surface, without opening a window
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        frontend = importlib.import_module('2D')
+        import pygame
+        pygame.display.init()
+        screen = pygame.display.set_mode((frontend.WIDTH, frontend.HEIGHT))
+        grid = (np.random.default_rng(0).random((frontend.ROWS, frontend.COLS)) < density).astype(np.uint8)
+        return lambda: frontend.draw_grid(screen, grid)
+    return setup
+
+def cv_effect_case(mode, width, height, block_size):
+    def setup():
+        import cv
+        source = cv.SyntheticSource(width, height)
+        frame = source.read()[1]
+        def step():
+            cv.mode, cv.block_size = mode, block_size
+            return cv.apply_effect(frame)
+        return step
+    return setup
+
+def cases(quick=False):
+    """The benchmark matrix as (name, params, cells per frame, setup) tuples"""
+    sizes_2d = (64, 256) if quick else (64, 256, 1024)
+    sizes_3d = (12, 32) if quick else (12, 32, 64)
+    densities = (0.5,) if quick else (0.1, 0.5)
+    
+    for backend in BACKENDS:
+        for size in sizes_2d:
+            for density in densities:
+                params = {'backend': backend, 'size': size, 'density': density}
+                yield 'life2d', params, size * size, life_case(backend, (size, size), 'B3/S23', density)
+    for backend in ('dense', 'sparse', 'chunked'):
+        for size in sizes_3d:
+            params = {'backend': backend, 'size': size, 'density': 0.15}
+            shape = (size, size, size)
+            yield 'life3d', params, size ** 3, life_case(backend, shape, 'B3/S2345', 0.15)
+    for size in ((200,) if quick else (200, 512)):
+        yield 'sandbox_step', {'size': size, 'threads': 1}, size * size, sandbox_case(size, 1)
+        for delta in (False, True):
+            yield 'sandbox_render', {'size': size, 'delta': delta}, size * size, sandbox_render_case(size, delta)
+    for density in densities:
+        yield 'draw_grid', {'density': density}, 80 * 60, draw_grid_case(density)
+    for width, height in (((640, 480),) if quick else ((640, 480), (1920, 1080))):
+        for mode in range(4):
+            params = {'mode': mode, 'width': width, 'height': height, 'block_size': 10}
+            yield 'cv_effect', params, width * height, cv_effect_case(mode, width, height, 10)
+
+def case_key(result):
+    return result['name'] + ' ' + ' '.join(f"{k}={v}" for k, v in sorted(result['params'].items()))
+
+def run(args):
+    results = []
+    for name, params, cells, setup in cases(args.quick):
+        result = {'name': name, 'params': params}
+        if args.filter and args.filter not in case_key(result):
+            continue
+        try:
+            step = setup()
+        except ImportError as exc:
+            print(f"skip {case_key(result)}: {exc}")
+            continue
+        latencies, peak = measure(step, args.frames)
+        result.update({
+            'cells': cells,
+            'frames': args.frames,
+            'mean_ms': latencies.mean() * 1000,
+            'p50_ms': np.percentile(latencies, 50) * 1000,
+            'p95_ms': np.percentile(latencies, 95) * 1000,
+            'p99_ms': np.percentile(latencies, 99) * 1000,
+            'cells_per_sec': cells / latencies.mean(),
+            'peak_mb': peak / 2**20,
+        })
+        results.append(result)
+        print(f"{case_key(result):<60} {result['p50_ms']:>9.3f} ms p50 {result['p95_ms']:>9.3f} ms p95 "
+              f"{result['cells_per_sec'] / 1e6:>9.2f} Mcells/s {result['peak_mb']:>8.2f} MB")
+    
+    if args.output:
+        report = {
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+        print(f"Wrote {len(results)} results to {args.output}")
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = {case_key(r): r for r in json.load(f)['results']}
+    with open(args.current) as f:
+        current = {case_key(r): r for r in json.load(f)['results']}
+    
+    regressions = 0
+    for key in sorted(current.keys() & baseline.keys()):
+        before, after = baseline[key][args.metric], current[key][args.metric]
+        ratio = after / before if before else float('inf')
+        flag = ''
+        if ratio > 1 + args.threshold:
+            flag = 'REGRESSION'
+            regressions += 1
+        elif ratio < 1 - args.threshold:
+            flag = 'faster'
+        print(f"{key:<60} {before:>9.3f} -> {after:>9.3f} {args.metric} ({ratio:5.2f}x) {flag}")
+    for key in sorted(current.keys() - baseline.keys()):
+        print(f"{key:<60} new")
+    for key in sorted(baseline.keys() - current.keys()):
+        print(f"{key:<60} missing")
+    
+    print(f"{regressions} regressions beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+def bench_cell_threads(size=2048, frames=10, max_threads=None, band_height=64, seed=0):
+    """Show how CellularAutomaton.update scales with the number of band threads"""
+    max_threads = max_threads or os.cpu_count() or 1
+    thread_counts = sorted({1, 2, 4, 8, 16, max_threads} & set(range(1, max_threads + 1)))
+    
+    print(f"cell.py update, {size}x{size}, band height {band_height}")
+    print(f"{'threads':>8} {'ms/frame':>10} {'fps':>8} {'speedup':>8}")
+    baseline = None
+    for threads in thread_counts:
+        automaton = CellularAutomaton(size, size, seed=seed, threads=threads, band_height=band_height)
+        seconds = time_frames(automaton.update, frames)
+        automaton.set_threads(1)
+        baseline = baseline or seconds
+        print(f"{threads:>8} {seconds * 1000:>10.1f} {1 / seconds:>8.1f} {baseline / seconds:>8.2f}")
+
+def bench_recording(generations=1000, keyframe_interval=100, seeks=200, seed=0):
+    """Bytes per generation of a recording, and how long a random seek takes"""
+    runs = [
+        ('life2d dense 256', lambda: make_simulation('dense', (256, 256), 'B3/S23', wrap=True, seed=seed), 0.5),
+        ('life2d dense 1024', lambda: make_simulation('dense', (1024, 1024), 'B3/S23', wrap=True, seed=seed), 0.5),
+        ('life3d dense 32', lambda: make_simulation('dense', (32, 32, 32), 'B3/S2345', seed=seed), 0.15),
+        ('sandbox 200', lambda: CellularAutomaton(200, 200, seed=seed), None),
+    ]
+    rng = np.random.default_rng(seed)
+    print(f"{generations} generations, keyframe every {keyframe_interval}")
+    print(f"{'run':<20} {'raw B/gen':>10} {'B/gen':>9} {'capture ms':>11} {'seek ms':>8} {'p95':>8} {'max':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, make, density in runs:
+            simulation = make()
+            if density is not None:
+                simulation.randomize(density)
+            path = os.path.join(directory, 'run.rec')
+            
+            capture = 0.0
+            with Recorder(path, simulation, keyframe_interval) as recorder:
+                for _ in range(generations):
+                    simulation.step()
+                    start = time.perf_counter()
+                    recorder.capture()
+                    capture += time.perf_counter() - start
+            raw = simulation.state.size / (8 if recorder.packed else 1)
+            
+            latencies = np.empty(seeks)
+            with Replay(path) as replay:
+                for i, index in enumerate(rng.integers(0, len(replay), seeks)):
+                    start = time.perf_counter()
+                    replay.seek(index)
+                    latencies[i] = time.perf_counter() - start
+            print(f"{name:<20} {raw:>10.0f} {recorder.bytes_per_frame:>9.0f} {capture / generations * 1000:>11.3f} "
+                  f"{latencies.mean() * 1000:>8.3f} {np.percentile(latencies, 95) * 1000:>8.3f} "
+                  f"{latencies.max() * 1000:>8.3f}")
+
+def check_allocations(sizes=(256, 1024), budget=64 * 1024, slack=16 * 1024):
+    """Peak bytes allocated by one step of each backend, failing when a step
+    allocates more than the budget, or more than slack bytes more on the
+    biggest board than on the smallest
+
+    Steps only allocate numpy's iteration buffers, which fill up to a fixed
+    size as boards grow, and a little bookkeeping per chunk or band; slack
+    covers those. tests/test_allocations.py holds the steps to a tighter
+    bound. The sparse backend builds index arrays of its live cells and
+    their neighbors every step, so it is only reported for comparison.
+    """
+    print(f"{'case':<28} " + ' '.join(f"{f'size {size}':>14}" for size in sizes))
+    failures = 0
+    for name, backend, dims, checked in (('life2d dense', 'dense', 2, True), ('life3d dense', 'dense', 3, True),
+                                         ('life2d chunked', 'chunked', 2, True),
+                                         ('life2d packed', 'packed', 2, True), ('life2d sparse', 'sparse', 2, False),
+                                         ('sandbox', None, 2, True)):
+        peaks = []
+        for size in sizes:
+            if backend is None:
+                step = CellularAutomaton(size, size, seed=0).step
+            else:
+                edge = size if dims == 2 else round(size ** (2 / 3))
+                step = life_case(backend, (edge,) * dims, 'B3/S23' if dims == 2 else 'B3/S2345', 0.5)()
+            step()  # The first step settles lazily made buffers
+            peaks.append(measure(step, 1)[1])
+        ok = not checked or (max(peaks) <= budget and peaks[-1] <= peaks[0] + slack)
+        failures += not ok
+        print(f"{name:<28} " + ' '.join(f"{peak / 1024:>11.1f} KB" for peak in peaks)
+              + ('' if not checked else ' ok' if ok else ' TOO MANY ALLOCATIONS'))
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the simulation steps and renderers")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    run_parser = commands.add_parser('run', help="Run the benchmark matrix")
+    run_parser.add_argument('--quick', action='store_true', help="Smaller sizes, fewer cases")
+    run_parser.add_argument('--frames', type=int, default=20)
+    run_parser.add_argument('--filter', help="Only run cases whose name or parameters contain this text")
+    run_parser.add_argument('--output', help="Write results to this JSON file")
+    
+    compare_parser = commands.add_parser('compare', help="Flag regressions against a baseline")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help="Allowed slowdown as a fraction (default 0.10)")
+    compare_parser.add_argument('--metric', default='p50_ms', choices=('mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'))
+    
+    threads_parser = commands.add_parser('threads', help="Sandbox step scaling across threads")
+    threads_parser.add_argument('--size', type=int, default=2048)
+    threads_parser.add_argument('--frames', type=int, default=10)
+    threads_parser.add_argument('--threads', type=int, default=None, help="Largest thread count to try")
+    threads_parser.add_argument('--band-height', type=int, default=64)
+    
+    record_parser = commands.add_parser('record', help="Recording size and replay seek latency")
+    record_parser.add_argument('--generations', type=int, default=1000)
+    record_parser.add_argument('--keyframe-interval', type=int, default=100)
+    record_parser.add_argument('--seeks', type=int, default=200)
+    
+    allocs_parser = commands.add_parser('allocs', help="Check that steps do not allocate")
+    allocs_parser.add_argument('--sizes', type=int, nargs='+', default=[256, 1024])
+    allocs_parser.add_argument('--budget', type=int, default=64 * 1024, help="Bytes a step may allocate")
+    allocs_parser.add_argument('--slack', type=int, default=16 * 1024,
+                               help="Bytes more a step may allocate on the biggest board than on the smallest")
+    
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    elif args.command == 'compare':
+        sys.exit(compare(args))
+    elif args.command == 'allocs':
+        sys.exit(check_allocations(args.sizes, args.budget, args.slack))
+    elif args.command == 'record':
+        bench_recording(args.generations, args.keyframe_interval, args.seeks)
+    else:
+        bench_cell_threads(args.size, args.frames, args.threads, args.band_height)
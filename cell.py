@@ -1,23 +1,16 @@
+import logging
+import time
+
 import numpy as np
 import cv2
-import random
-from enum import IntEnum
 
-class CellState(IntEnum):
-    EMPTY = 0
-    SAND = 1
-    WATER = 2
-    PLANT = 3
-    FIRE = 4
-    LAVA = 5
-    STONE = 6
+from engine import Profiler, Recorder, StatsCollector
+from engine.sandbox import CellState, Sandbox
 
-class CellularAutomaton:
-    def __init__(self, width=200, height=200):
-        self.width = width
-        self.height = height
-        self.grid = np.zeros((height, width), dtype=np.uint8)
-        self.initialize_grid()
+class CellularAutomaton(Sandbox):
+    """The sandbox with colors, a brush and pausing for the interactive window"""
+    def __init__(self, width=200, height=200, seed=None, threads=1, band_height=64):
+        super().__init__(width, height, seed, threads, band_height)
         self.colors = {
             CellState.EMPTY: (0, 0, 0),
             CellState.SAND: (210, 190, 120),
@@ -27,211 +20,146 @@ class CellularAutomaton:
             CellState.LAVA: (207, 16, 32),
             CellState.STONE: (128, 128, 128)
         }
+        self.palette = np.array([self.colors[state] for state in CellState], dtype=np.uint8)
         self.paused = False
         self.brush_size = 3
         self.brush_type = CellState.SAND
-        self.initialize_random()
-
-    def initialize_grid(self):
-        # Create initial patterns
-        self.grid.fill(CellState.EMPTY)
-        
-        # Create sand dunes
-        for _ in range(10):
-            x, y = random.randint(0, self.width-1), random.randint(0, self.height//2)
-            self.create_blob(x, y, CellState.SAND, 15)
-        
-        # Create water pools
-        for _ in range(5):
-            x, y = random.randint(0, self.width-1), random.randint(self.height//2, self.height-1)
-            self.create_blob(x, y, CellState.WATER, 10)
-        
-        # Create plants
-        for _ in range(20):
-            x, y = random.randint(0, self.width-1), random.randint(0, self.height-1)
-            if self.grid[y, x] == CellState.EMPTY:
-                self.grid[y, x] = CellState.PLANT
-        
-        # Create stone formations
-        for _ in range(7):
-            x, y = random.randint(0, self.width-1), random.randint(0, self.height-1)
-            self.create_blob(x, y, CellState.STONE, 8)
-
-    def initialize_random(self):
-        # Random initialization for quick start
-        for _ in range(3000):
-            x, y = random.randint(0, self.width-1), random.randint(0, self.height-1)
-            self.grid[y, x] = random.choice(list(CellState)[1:])  # Exclude EMPTY
-
-    def create_blob(self, x, y, cell_type, size):
-        for i in range(-size, size):
-            for j in range(-size, size):
-                if (i*i + j*j) < size*size:
-                    nx, ny = x + i, y + j
-                    if 0 <= nx < self.width and 0 <= ny < self.height:
-                        if random.random() > 0.3:  # Create organic shapes
-                            self.grid[ny, nx] = cell_type
+        # Palette image of the grid, and the stamp of the board it shows
+        self.image = None
+        self.image_stamp = None
 
     def update(self):
         if self.paused:
             return
-            
-        new_grid = self.grid.copy()
-        
-        for y in range(self.height-1, -1, -1):
-            for x in range(self.width):
-                cell = self.grid[y, x]
-                
-                # Skip empty cells
-                if cell == CellState.EMPTY:
-                    continue
-                
-                # Physics for SAND
-                if cell == CellState.SAND:
-                    self.move_sand(new_grid, x, y)
-                
-                # Physics for WATER
-                elif cell == CellState.WATER:
-                    self.move_water(new_grid, x, y)
-                
-                # Plant growth and fire interaction
-                elif cell == CellState.PLANT:
-                    self.grow_plants(new_grid, x, y)
-                
-                # Fire physics
-                elif cell == CellState.FIRE:
-                    self.spread_fire(new_grid, x, y)
-                
-                # Lava physics
-                elif cell == CellState.LAVA:
-                    self.flow_lava(new_grid, x, y)
-        
-        self.grid = new_grid
-
-    def move_sand(self, new_grid, x, y):
-        # Sand falls down or diagonally
-        below = (x, y+1)
-        dirs = [(x-1, y+1), (x+1, y+1), (x, y+1)]
-        random.shuffle(dirs)
-        
-        for nx, ny in dirs:
-            if 0 <= nx < self.width and ny < self.height:
-                if new_grid[ny, nx] == CellState.EMPTY or new_grid[ny, nx] == CellState.WATER:
-                    new_grid[y, x] = new_grid[ny, nx]  # Swap positions
-                    new_grid[ny, nx] = CellState.SAND
-                    return
-
-    def move_water(self, new_grid, x, y):
-        # Water flows down, then sideways
-        below = (x, y+1)
-        sides = [(x-1, y), (x+1, y)]
-        down_sides = [(x-1, y+1), (x+1, y+1)]
-        random.shuffle(sides)
-        random.shuffle(down_sides)
-        
-        # Try to move down
-        for nx, ny in [below] + down_sides:
-            if 0 <= nx < self.width and ny < self.height:
-                if new_grid[ny, nx] == CellState.EMPTY:
-                    new_grid[y, x] = CellState.EMPTY
-                    new_grid[ny, nx] = CellState.WATER
-                    return
-        
-        # Try to move sideways
-        for nx, ny in sides:
-            if 0 <= nx < self.width:
-                if new_grid[ny, nx] == CellState.EMPTY:
-                    new_grid[y, x] = CellState.EMPTY
-                    new_grid[ny, nx] = CellState.WATER
-                    return
-
-    def grow_plants(self, new_grid, x, y):
-        # Plants can grow upward and to sides
-        if y > 0 and random.random() < 0.01:
-            dirs = [(x, y-1), (x-1, y), (x+1, y)]
-            random.shuffle(dirs)
-            
-            for nx, ny in dirs:
-                if 0 <= nx < self.width and 0 <= ny < self.height:
-                    if new_grid[ny, nx] == CellState.EMPTY:
-                        new_grid[ny, nx] = CellState.PLANT
-        
-        # Plants catch fire when near lava or fire
-        neighbors = self.get_neighbors(x, y)
-        if CellState.LAVA in neighbors or CellState.FIRE in neighbors:
-            if random.random() < 0.3:
-                new_grid[y, x] = CellState.FIRE
-
-    def spread_fire(self, new_grid, x, y):
-        # Fire spreads to adjacent plants
-        neighbors = self.get_neighbors(x, y)
-        for nx, ny in neighbors:
-            if new_grid[ny, nx] == CellState.PLANT and random.random() < 0.4:
-                new_grid[ny, nx] = CellState.FIRE
-        
-        # Fire may turn to smoke (empty) or be extinguished by water
-        if CellState.WATER in self.get_neighbors(x, y, True):
-            new_grid[y, x] = CellState.EMPTY
-        elif random.random() < 0.1:
-            new_grid[y, x] = CellState.EMPTY
-
-    def flow_lava(self, new_grid, x, y):
-        # Lava flows like sand but can set things on fire
-        below = (x, y+1)
-        dirs = [(x-1, y+1), (x+1, y+1), (x, y+1)]
-        random.shuffle(dirs)
-        
-        for nx, ny in dirs:
-            if 0 <= nx < self.width and ny < self.height:
-                target = new_grid[ny, nx]
-                
-                if target == CellState.EMPTY:
-                    new_grid[y, x] = CellState.EMPTY
-                    new_grid[ny, nx] = CellState.LAVA
-                    return
-                elif target == CellState.WATER:
-                    new_grid[y, x] = CellState.STONE
-                    new_grid[ny, nx] = CellState.STONE
-                    return
-                elif target == CellState.PLANT:
-                    new_grid[ny, nx] = CellState.FIRE
-
-    def get_neighbors(self, x, y, include_diagonals=True):
-        neighbors = []
-        dirs = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        if include_diagonals:
-            dirs += [(-1, -1), (-1, 1), (1, -1), (1, 1)]
-        
-        for dx, dy in dirs:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < self.width and 0 <= ny < self.height:
-                neighbors.append((nx, ny, self.grid[ny, nx]))
-        
-        return [state for _, _, state in neighbors]
+        self.step()
 
     def render(self):
-        # Create RGB image
-        img = np.zeros((self.height, self.width, 3), dtype=np.uint8)
-        
-        for y in range(self.height):
-            for x in range(self.width):
-                img[y, x] = self.colors[self.grid[y, x]]
+        # Repaint just the changed cells when one step is all that happened
+        # since the last render; otherwise look every cell up in the palette
+        if self.delta_applies(self.image_stamp):
+            cells = self.changed_cells
+            self.image.reshape(-1, 3)[cells] = self.palette[self.grid.ravel()[cells]]
+        elif self.image_stamp != self.stamp:
+            self.image = self.palette[self.grid]
+        self.image_stamp = self.stamp
         
         # Scale up for better visualization
-        return cv2.resize(img, (800, 800), interpolation=cv2.INTER_NEAREST)
+        return cv2.resize(self.image, (VIEW_SIZE, VIEW_SIZE), interpolation=cv2.INTER_NEAREST)
 
     def draw_with_brush(self, x, y):
-        for i in range(-self.brush_size, self.brush_size+1):
-            for j in range(-self.brush_size, self.brush_size+1):
-                nx, ny = x + i, y + j
-                if 0 <= nx < self.width and 0 <= ny < self.height:
-                    if i*i + j*j <= self.brush_size*self.brush_size:
-                        self.grid[ny, nx] = self.brush_type
+        # Accepts a single point or arrays of points along a stroke
+        self.scatter_disks(np.atleast_1d(x), np.atleast_1d(y), self.brush_type,
+                           self.brush_size, inclusive=True)
+
+# Seed for the world and physics; None gives a fresh run every launch
+SEED = None
+
+# Worker threads stepping the grid bands
+THREADS = 1
+
+# Frame pacing: rendered frames per second, simulation steps per frame, and how
+# many renders in a row may be dropped to catch up when a frame runs late
+FPS = 30
+SUBSTEPS = 1
+MAX_FRAME_SKIP = 4
+
+# Set to logging.DEBUG to log the timing of every frame
+LOG_LEVEL = logging.INFO
+
+# Instrumentation feeding the timing log; I shows it on screen (and turns it
+# on if PROFILE is off), O runs cProfile for PROFILE_FRAMES frames, D dumps
+# the recent frame samples
+PROFILE = True
+PROFILE_FRAMES = 100
+PROFILE_STATS = 'profile_cell.prof'
+PROFILE_DUMP = 'profile_cell.json'
+
+# Path to record the run to for replay.py, e.g. 'run_cell.rec'
+RECORD = None
+
+WINDOW = "Automatic Cell Machine"
+VIEW_SIZE = 800
+
+log = logging.getLogger(__name__)
+
+class FrameScheduler:
+    """Fixed-timestep pacing: each frame runs a fixed number of simulation steps
+    and renders unless the loop has fallen behind its deadline"""
+    def __init__(self, fps=FPS, substeps=SUBSTEPS, max_skip=MAX_FRAME_SKIP, clock=time.perf_counter):
+        self.frame_time = 1.0 / fps
+        self.substeps = substeps
+        self.max_skip = max_skip
+        self.clock = clock
+        self.deadline = clock() + self.frame_time
+        self.skipped = 0
+
+    def should_render(self):
+        # Drop renders while late, but never more than max_skip in a row
+        if self.clock() > self.deadline and self.skipped < self.max_skip:
+            self.skipped += 1
+            return False
+        self.skipped = 0
+        return True
+
+    def wait_ms(self):
+        """Milliseconds to wait for input until the next frame is due, at least 1"""
+        now = self.clock()
+        wait = self.deadline - now
+        self.deadline += self.frame_time
+        # Too far behind to catch up: start counting from now instead
+        if now - self.deadline > self.max_skip * self.frame_time:
+            self.deadline = now + self.frame_time
+        return max(1, int(wait * 1000))
+
+class StrokeQueue:
+    """Collects brush points from the mouse callback to paint in one batch"""
+    def __init__(self, automaton):
+        self.automaton = automaton
+        self.points = []
+
+    def on_mouse(self, event, x, y, flags, param):
+        if event in (cv2.EVENT_LBUTTONDOWN, cv2.EVENT_MOUSEMOVE) and flags & cv2.EVENT_FLAG_LBUTTON:
+            # Scale mouse coordinates to grid
+            self.points.append((x * self.automaton.width // VIEW_SIZE,
+                                y * self.automaton.height // VIEW_SIZE))
+
+    def apply(self):
+        """Paint every queued point and return how many there were"""
+        if not self.points:
+            return 0
+        points, self.points = self.points, []
+        xs, ys = np.array(points).T
+        self.automaton.draw_with_brush(xs, ys)
+        return len(points)
+
+def handle_key(automaton, key):
+    """Apply a key press, returning False when the program should exit"""
+    if key == 27:  # ESC
+        return False
+    elif key == ord(' '):
+        automaton.paused = not automaton.paused
+    elif key == ord('r'):
+        automaton.reseed(automaton.seed)
+        automaton.initialize_grid()
+    elif key == ord('c'):
+        automaton.clear()
+    elif key == ord('+'):
+        automaton.brush_size = min(10, automaton.brush_size + 1)
+    elif key == ord('-'):
+        automaton.brush_size = max(1, automaton.brush_size - 1)
+    elif key in [ord(str(i)) for i in range(1, 8)]:
+        automaton.brush_type = CellState(int(key) - 49)  # Convert key to enum
+    return True
 
 # Main simulation loop
 def main():
-    automaton = CellularAutomaton(200, 200)
-    cv2.namedWindow("Automatic Cell Machine")
+    logging.basicConfig(level=LOG_LEVEL, format="%(message)s")
+    automaton = CellularAutomaton(200, 200, seed=SEED, threads=THREADS)
+    cv2.namedWindow(WINDOW)
+    
+    # Register input once; the callback only queues strokes
+    strokes = StrokeQueue(automaton)
+    cv2.setMouseCallback(WINDOW, strokes.on_mouse)
     
     print("Controls:")
     print("SPACE: Pause/Resume")
@@ -240,44 +168,77 @@ def main():
     print("1-7: Select cell type")
     print("Mouse: Draw on grid")
     print("+/-: Change brush size")
+    print("I: Show timing overlay")
+    print("O: Profile the next frames with cProfile")
+    print("D: Dump recent frame timings")
     print("ESC: Exit")
     
-    while True:
-        img = automaton.render()
-        cv2.imshow("Automatic Cell Machine", img)
-        
-        automaton.update()
-        
-        key = cv2.waitKey(1) & 0xFF
-        if key == 27:  # ESC
-            break
-        elif key == ord(' '):
-            automaton.paused = not automaton.paused
-        elif key == ord('r'):
-            automaton.initialize_grid()
-        elif key == ord('c'):
-            automaton.grid.fill(CellState.EMPTY)
-        elif key == ord('+'):
-            automaton.brush_size = min(10, automaton.brush_size + 1)
-        elif key == ord('-'):
-            automaton.brush_size = max(1, automaton.brush_size - 1)
-        elif key in [ord(str(i)) for i in range(1, 8)]:
-            automaton.brush_type = CellState(int(key) - 49)  # Convert key to enum
-        
-        # Mouse drawing
-        mouse_x, mouse_y = cv2.getWindowImageRect("Automatic Cell Machine")[:2]
-        mouse_events = [cv2.EVENT_LBUTTONDOWN, cv2.EVENT_MOUSEMOVE]
-        
-        def mouse_callback(event, x, y, flags, param):
-            if event in mouse_events and flags & cv2.EVENT_FLAG_LBUTTON:
-                # Scale mouse coordinates to grid
-                grid_x = int(x * automaton.width / 800)
-                grid_y = int(y * automaton.height / 800)
-                automaton.draw_with_brush(grid_x, grid_y)
-        
-        cv2.setMouseCallback("Automatic Cell Machine", mouse_callback)
-
+    recorder = None
+    if RECORD:
+        recorder = Recorder(RECORD, automaton, meta={'palette': automaton.palette.tolist()})
+    
+    stats = StatsCollector(automaton, region=None)
+    scheduler = FrameScheduler()
+    profiler = Profiler(enabled=PROFILE, history=FPS)
+    overlay = False
+    running = True
+    while running:
+        with profiler.timer('input'):
+            strokes.apply()
+        
+        with profiler.timer('step'):
+            for _ in range(scheduler.substeps):
+                automaton.update()
+                if recorder:
+                    recorder.capture()
+        
+        rendered = scheduler.should_render()
+        if rendered:
+            with profiler.timer('render'):
+                img = automaton.render()
+                if overlay:
+                    for i, line in enumerate(profiler.summary_lines()):
+                        cv2.putText(img, line, (10, 20 + i * 18), cv2.FONT_HERSHEY_SIMPLEX,
+                                    0.5, (255, 255, 255), 1)
+                cv2.imshow(WINDOW, img)
+        
+        # waitKey pumps the window events, runs the mouse callback and paces the loop
+        key = cv2.waitKey(scheduler.wait_ms()) & 0xFF
+        with profiler.timer('input'):
+            if key == ord('i'):
+                overlay = not overlay
+                profiler.enabled = overlay or PROFILE
+            elif key == ord('o'):
+                profiler.profile_frames(PROFILE_FRAMES, PROFILE_STATS)
+            elif key == ord('d'):
+                profiler.dump(PROFILE_DUMP)
+            else:
+                running = handle_key(automaton, key)
+        
+        if profiler.enabled:
+            profiler.count('skipped', int(not rendered))
+            profiler.count('changed', automaton.changed)
+            for name, count in stats.sample()['materials'].items():
+                profiler.count(name.lower(), count)
+            frame = profiler.frame
+            log.debug("frame %d: input %.2f ms, step %.2f ms, render %.2f ms%s", profiler.frames,
+                      frame.get('input', 0), frame.get('step', 0), frame.get('render', 0),
+                      "" if rendered else " (render skipped)")
+        profiler.end_frame()
+        
+        # Summarize about once a second
+        if profiler.enabled and profiler.frames % FPS == 0:
+            summary = profiler.summary()
+            mean = lambda name: summary.get(name, {'mean': 0})['mean']
+            log.info("last %d frames: input %.2f ms, step %.2f ms, render %.2f ms per frame, %d renders skipped",
+                     len(profiler.samples), mean('input'), mean('step'), mean('render'),
+                     round(mean('skipped') * len(profiler.samples)))
+
+    if recorder:
+        recorder.close()
+        log.info("Recorded %d frames to %s, %.0f bytes per frame", recorder.frames, RECORD,
+                 recorder.bytes_per_frame)
     cv2.destroyAllWindows()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
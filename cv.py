@@ -1,14 +1,143 @@
+import argparse
+import queue
+import threading
+import time
+
 import cv2
 import numpy as np
 
-# Initialize webcam
-cap = cv2.VideoCapture(0)
-cv2.namedWindow('Block Art Generator')
+from engine import Profiler
+
+WINDOW = 'Block Art Generator'
+MODES = ["Normal", "Warp", "Psychedelic", "Life"]
 
 # Interactive parameters
 block_size = 20
 color_intensity = 5
-mode = 0  # 0: Normal, 1: Warp, 2: Psychedelic
+mode = 0  # 0: Normal, 1: Warp, 2: Psychedelic, 3: Life
+
+# Life mode: blocks brighter than the threshold are live seeds, a share of
+# which is mixed into the board each frame before it steps
+LIFE_THRESHOLD = 128
+LIFE_SEED_RATE = 0.05
+LIFE_STEPS = 1
+
+# Warp shape and animation: phase advance per frame in radians, 0 for a still warp
+WARP_AMPLITUDE = 30
+WARP_WAVELENGTH = 20
+WARP_SPEED = 0.0
+warp = None
+warp_phase = 0.0
+
+# Instrumentation: I shows stage timings on screen (turning the timers on if
+# PROFILE is off), O runs cProfile on the effect thread for PROFILE_FRAMES
+# frames, D dumps the recent frame samples
+PROFILE = False
+PROFILE_FRAMES = 100
+PROFILE_STATS = 'profile_cv.prof'
+PROFILE_DUMP = 'profile_cv.json'
+profiler = Profiler(enabled=PROFILE)
+overlay = False
+profile_request = 0
+
+class WarpMap:
+    """Remap tables for the warp effect at one frame size
+
+    The sine offsets only vary along one axis, so the maps are the pixel grid
+    plus a broadcast row or column. Animating just recomputes those offsets
+    into the same buffers, and a still warp is converted once to fixed point.
+    """
+    def __init__(self, width, height, amplitude=WARP_AMPLITUDE, wavelength=WARP_WAVELENGTH):
+        self.size = (width, height)
+        self.amplitude = amplitude
+        self.wavelength = wavelength
+        self.xs = np.arange(width, dtype=np.float32)
+        self.ys = np.arange(height, dtype=np.float32)
+        self.map_x = np.empty((height, width), dtype=np.float32)
+        self.map_y = np.empty((height, width), dtype=np.float32)
+        self.phase = None
+        self.fixed = None
+
+    def maps(self, phase=0.0, animated=False):
+        """Return the (map1, map2) pair for cv2.remap at this phase"""
+        if phase != self.phase:
+            width, height = self.size
+            shift_x = self.amplitude * np.sin(self.ys / self.wavelength + phase)
+            shift_y = self.amplitude * np.cos(self.xs / self.wavelength + phase)
+            np.add(self.xs[None, :], shift_x[:, None], out=self.map_x)
+            np.mod(self.map_x, width, out=self.map_x)
+            np.add(self.ys[:, None], shift_y[None, :], out=self.map_y)
+            np.mod(self.map_y, height, out=self.map_y)
+            self.phase = phase
+            self.fixed = None
+        if animated:
+            return self.map_x, self.map_y
+        # Fixed-point maps remap faster, worth converting when they are reused
+        if self.fixed is None:
+            self.fixed = cv2.convertMaps(self.map_x, self.map_y, cv2.CV_16SC2)
+        return self.fixed
+
+class ColorShift:
+    """Psychedelic hue shift and saturation gain as one per-channel lookup table
+
+    The table is rebuilt only when the intensity changes and is applied with
+    cv2.LUT, with the HSV conversions writing into buffers kept between frames.
+    """
+    def __init__(self):
+        self.intensity = None
+        self.lut = np.empty((256, 1, 3), dtype=np.uint8)
+        self.hsv = None
+        self.out = None
+
+    def build(self, intensity):
+        values = np.arange(256)
+        self.lut[:, 0, 0] = (values + intensity * 10) % 180  # Hue wraps at 180
+        self.lut[:, 0, 1] = np.minimum(values * intensity, 255)  # Saturation, computed before narrowing
+        self.lut[:, 0, 2] = values
+        self.intensity = intensity
+
+    def apply(self, image, intensity):
+        if intensity != self.intensity:
+            self.build(intensity)
+        if self.hsv is None or self.hsv.shape != image.shape:
+            self.hsv = np.empty_like(image)
+            self.out = np.empty_like(image)
+        cv2.cvtColor(image, cv2.COLOR_BGR2HSV, dst=self.hsv)
+        cv2.LUT(self.hsv, self.lut, dst=self.hsv)
+        cv2.cvtColor(self.hsv, cv2.COLOR_HSV2BGR, dst=self.out)
+        return self.out
+
+color_shift = ColorShift()
+
+# Counts the eight neighbors of every cell in one filter pass
+LIFE_KERNEL = np.array([[1, 1, 1], [1, 0, 1], [1, 1, 1]], dtype=np.float32)
+
+class LifeBoard:
+    """Game of Life on the block grid, seeded from the camera"""
+    def __init__(self, rows, cols, seed=None):
+        self.shape = (rows, cols)
+        self.rng = np.random.default_rng(seed)
+        self.board = np.zeros((rows, cols), dtype=np.uint8)
+        self.counts = np.empty((rows, cols), dtype=np.uint8)
+        self.gray = np.empty((rows, cols), dtype=np.uint8)
+
+    def seed_from(self, small):
+        """Bring to life a random share of the cells that are bright in small"""
+        cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=self.gray)
+        seeds = (self.gray > LIFE_THRESHOLD) & (self.rng.random(self.shape) < LIFE_SEED_RATE)
+        self.board |= seeds
+
+    def step(self):
+        """Advance one generation of Conway's rules (B3/S23), edges dead"""
+        cv2.filter2D(self.board, -1, LIFE_KERNEL, dst=self.counts, borderType=cv2.BORDER_CONSTANT)
+        survive = (self.board == 1) & (self.counts == 2)
+        self.board[:] = survive | (self.counts == 3)
+
+    def render(self, small):
+        """Live cells keep their camera color, dead ones are dimmed"""
+        return np.where(self.board[:, :, None] == 1, small, small // 4)
+
+life = None
 
 def update_block_size(val):
     global block_size
@@ -18,14 +147,9 @@ def update_color_intensity(val):
     global color_intensity
     color_intensity = max(1, val)
 
-# Create trackbars
-cv2.createTrackbar('Block Size', 'Block Art Generator', block_size, 100, update_block_size)
-cv2.createTrackbar('Color Intensity', 'Block Art Generator', color_intensity, 20, update_color_intensity)
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
+def apply_effect(frame):
+    """Turn one camera frame into block art in the current mode"""
+    global warp, warp_phase, life
     
     # Convert to block art
     height, width = frame.shape[:2]
@@ -35,36 +159,335 @@ while True:
                       (width // block_size, height // block_size),
                       interpolation=cv2.INTER_NEAREST)
     
+    # Color effects are per pixel, so apply them to the few block pixels
+    # before the nearest-neighbor upscale copies them out
+    if mode == 2:
+        # Psychedelic color shift
+        small = color_shift.apply(small, color_intensity)
+    elif mode == 3:
+        # Life on the block grid, restarted whenever the grid size changes
+        if life is None or life.shape != small.shape[:2]:
+            life = LifeBoard(*small.shape[:2])
+        life.seed_from(small)
+        for _ in range(LIFE_STEPS):
+            life.step()
+        small = life.render(small)
+    
     # Upscale back to original size
     blocky = cv2.resize(small, (width, height), interpolation=cv2.INTER_NEAREST)
     
     # Apply artistic effects based on mode
     if mode == 1:
-        # Warp effect
-        map_x = np.float32([[(x + 30*np.sin(y/20)) % width for x in range(width)] for y in range(height)])
-        map_y = np.float32([[(y + 30*np.cos(x/20)) % height for x in range(width)] for y in range(height)])
-        blocky = cv2.remap(blocky, map_x, map_y, cv2.INTER_CUBIC)
-    elif mode == 2:
-        # Psychedelic color shift
-        hsv = cv2.cvtColor(blocky, cv2.COLOR_BGR2HSV)
-        hsv[:, :, 0] = (hsv[:, :, 0] + color_intensity * 10) % 180
-        hsv[:, :, 1] = np.minimum(hsv[:, :, 1] * color_intensity, 255)
-        blocky = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+        # Warp effect, with maps rebuilt only when the capture size changes
+        if warp is None or warp.size != (width, height):
+            warp = WarpMap(width, height)
+        warp_phase += WARP_SPEED
+        map1, map2 = warp.maps(warp_phase, animated=WARP_SPEED != 0)
+        blocky = cv2.remap(blocky, map1, map2, cv2.INTER_CUBIC)
     
-    # Display instructions
-    cv2.putText(blocky, f'M: Change Mode (Current: {["Normal", "Warp", "Psychedelic"][mode]})', 
-               (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-    cv2.putText(blocky, 'ESC: Exit', (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+    return blocky
+
+class SyntheticSource:
+    """Generated test frames with the cv2.VideoCapture read/release interface
+
+    Colored bands scroll across the frame so every effect has edges and hues
+    to work on. Frames are produced as fast as they are read unless fps is set.
+    """
+    def __init__(self, width=640, height=480, frames=None, fps=None):
+        self.frames = frames
+        self.interval = 1.0 / fps if fps else 0.0
+        self.count = 0
+        self.next_time = time.perf_counter()
+        ys, xs = np.mgrid[0:height, 0:width]
+        self.base = np.stack([xs * 255 // max(width - 1, 1),
+                              ys * 255 // max(height - 1, 1),
+                              (xs + ys) % 256], axis=-1).astype(np.uint8)
+
+    def read(self):
+        if self.frames is not None and self.count >= self.frames:
+            return False, None
+        if self.interval:
+            delay = self.next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self.next_time += self.interval
+        frame = np.roll(self.base, self.count * 4, axis=1)
+        self.count += 1
+        return True, frame
+
+    def release(self):
+        pass
+
+def open_source(spec, frames=None, fps=None):
+    """Open a frame source: a camera index, 'synthetic[:WxH]' or a video file path"""
+    if spec.startswith('synthetic'):
+        width, height = 640, 480
+        if ':' in spec:
+            width, height = (int(v) for v in spec.split(':', 1)[1].split('x'))
+        return SyntheticSource(width, height, frames, fps)
+    cap = cv2.VideoCapture(int(spec) if spec.isdigit() else spec)
+    if not cap.isOpened():
+        kind = "camera" if spec.isdigit() else "video file"
+        raise OSError(f"Could not open {kind} {spec!r}")
+    return cap
+
+class DisplaySink:
+    """Shows frames in the interactive window; must run on the main thread"""
+    def __init__(self):
+        cv2.namedWindow(WINDOW)
+        # Create trackbars
+        cv2.createTrackbar('Block Size', WINDOW, block_size, 100, update_block_size)
+        cv2.createTrackbar('Color Intensity', WINDOW, color_intensity, 20, update_color_intensity)
+
+    def write(self, frame):
+        """Show a frame and handle key presses, returning False to stop"""
+        global mode, overlay, profile_request
+        
+        # Display instructions
+        cv2.putText(frame, f'M: Change Mode (Current: {MODES[mode]})', 
+                   (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        cv2.putText(frame, 'ESC: Exit', (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        if overlay:
+            for i, line in enumerate(profiler.summary_lines()):
+                cv2.putText(frame, line, (10, 90 + i * 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        
+        # Show result
+        cv2.imshow(WINDOW, frame)
+        
+        # Handle key presses
+        key = cv2.waitKey(1)
+        if key == 27:  # ESC
+            return False
+        elif key == ord('m'):
+            mode = (mode + 1) % len(MODES)
+        elif key == ord('i'):
+            overlay = not overlay
+            profiler.enabled = overlay or PROFILE
+        elif key == ord('o'):
+            profile_request = PROFILE_FRAMES
+        elif key == ord('d'):
+            profiler.dump(PROFILE_DUMP)
+        return True
+
+    def close(self):
+        cv2.destroyAllWindows()
+
+class VideoFileSink:
+    """Headless sink writing frames to a video file, opened on the first frame"""
+    def __init__(self, path, fps=30, fourcc='mp4v'):
+        self.path = path
+        self.fps = fps
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self.writer = None
+
+    def write(self, frame):
+        if self.writer is None:
+            height, width = frame.shape[:2]
+            self.writer = cv2.VideoWriter(self.path, self.fourcc, self.fps, (width, height))
+        self.writer.write(frame)
+        return True
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.release()
+
+class LatestQueue:
+    """Bounded hand-off between stages that drops the stalest frame when full
+
+    With drop=False it waits for room instead, so a fast source is slowed
+    down to the pace of the stages after it and no frame is lost.
+    """
+    def __init__(self, maxsize=2, drop=True):
+        self.queue = queue.Queue(maxsize)
+        self.drop = drop
+        self.dropped = 0
+
+    def put(self, item):
+        if not self.drop:
+            self.queue.put(item)
+            return
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def put_end(self):
+        # The end marker must not be dropped, so wait for room
+        self.queue.put(None)
+
+    def get(self, timeout=0.1):
+        return self.queue.get(timeout=timeout)
+
+class Pipeline:
+    """Capture, effect and sink stages joined by bounded queues
+
+    With drop set the queues throw away stale frames to keep latency low,
+    which suits live cameras; otherwise every frame gets through and the
+    stages wait on each other. Capture and effect run on worker threads, the sink on the calling thread
+    (HighGUI windows need the main thread). Each frame carries its capture
+    time so the sink can measure end-to-end latency. Capture and effect time
+    themselves with profilers of their own and pass each frame's sample along
+    with it; the sink merges them into the module profiler, one sample per
+    frame reaching it. cProfile runs requested through profile_request cover
+    the effect thread.
+    """
+    def __init__(self, source, sink, effect=apply_effect, queue_size=2, drop=True):
+        self.source = source
+        self.sink = sink
+        self.effect = effect
+        self.captured = LatestQueue(queue_size, drop)
+        self.processed = LatestQueue(queue_size, drop)
+        self.stop = threading.Event()
+        self.counts = {'captured': 0, 'processed': 0, 'shown': 0}
+        self.capture_profiler = Profiler()
+        self.effect_profiler = Profiler()
+        self.latencies = []
+
+    def capture_loop(self):
+        try:
+            while not self.stop.is_set():
+                self.capture_profiler.enabled = profiler.enabled
+                with self.capture_profiler.timer('capture'):
+                    ret, frame = self.source.read()
+                if not ret:
+                    break
+                self.counts['captured'] += 1
+                self.captured.put((time.perf_counter(), frame, self.capture_profiler.end_frame()))
+        finally:
+            self.captured.put_end()
+
+    def effect_loop(self):
+        global profile_request
+        try:
+            while True:
+                try:
+                    item = self.captured.get()
+                except queue.Empty:
+                    # The sink stopped early; the end marker may have been drained
+                    if self.stop.is_set():
+                        break
+                    continue
+                if item is None:
+                    break
+                captured_at, frame, capture_sample = item
+                
+                # cProfile only sees the thread that starts it, so start it here
+                if profile_request:
+                    self.effect_profiler.profile_frames(profile_request, PROFILE_STATS)
+                    profile_request = 0
+                self.effect_profiler.enabled = profiler.enabled
+                with self.effect_profiler.timer('effect'):
+                    out = self.effect(frame)
+                samples = capture_sample, self.effect_profiler.end_frame()
+                
+                self.processed.put((captured_at, out, samples))
+                self.counts['processed'] += 1
+        finally:
+            self.processed.put_end()
+
+    def run(self):
+        """Run until the source ends or the sink asks to stop, then return stats"""
+        workers = [threading.Thread(target=self.capture_loop, daemon=True),
+                   threading.Thread(target=self.effect_loop, daemon=True)]
+        for worker in workers:
+            worker.start()
+        
+        start = time.perf_counter()
+        try:
+            while True:
+                try:
+                    item = self.processed.get()
+                except queue.Empty:
+                    continue
+                if item is None:
+                    break
+                captured_at, frame, samples = item
+                profiler.merge(samples[0], self.capture_profiler.timers)
+                profiler.merge(samples[1], self.effect_profiler.timers)
+                with profiler.timer('sink'):
+                    keep_going = self.sink.write(frame)
+                self.latencies.append(time.perf_counter() - captured_at)
+                self.counts['shown'] += 1
+                if profiler.enabled:
+                    profiler.count('latency_ms', self.latencies[-1] * 1000)
+                    profiler.count('dropped', self.captured.dropped + self.processed.dropped)
+                profiler.end_frame()
+                if not keep_going:
+                    break
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stop.set()
+            # Drain so the workers are never stuck waiting for room for their
+            # frames or end marker; once capture is done, leave its marker for effect
+            capture, effect = workers
+            while capture.is_alive() or effect.is_alive():
+                try:
+                    self.processed.queue.get_nowait()
+                except queue.Empty:
+                    pass
+                if capture.is_alive():
+                    try:
+                        self.captured.queue.get_nowait()
+                    except queue.Empty:
+                        pass
+                time.sleep(0.001)
+            self.source.release()
+            self.sink.close()
+        return self.stats(elapsed)
+
+    def stats(self, elapsed):
+        latencies = np.array(self.latencies or [0.0]) * 1000
+        return {
+            **self.counts,
+            'dropped_captured': self.captured.dropped,
+            'dropped_processed': self.processed.dropped,
+            'seconds': elapsed,
+            'fps': self.counts['shown'] / elapsed if elapsed else 0.0,
+            'latency_ms_mean': float(latencies.mean()),
+            'latency_ms_p95': float(np.percentile(latencies, 95)),
+        }
+
+def main():
+    global mode, profile_request
+    parser = argparse.ArgumentParser(description="Turn a video stream into block art")
+    parser.add_argument('--source', default='0',
+                        help="Camera index, video file path, or synthetic[:WxH] (default: camera 0)")
+    parser.add_argument('--output', help="Write to this video file instead of showing a window")
+    parser.add_argument('--frames', type=int, help="Stop a synthetic source after this many frames")
+    parser.add_argument('--fps', type=float, default=30,
+                        help="Frame rate of a synthetic source, 0 for as fast as possible")
+    parser.add_argument('--mode', type=int, default=mode, choices=range(len(MODES)))
+    parser.add_argument('--queue-size', type=int, default=2)
+    parser.add_argument('--drop', action=argparse.BooleanOptionalAction, default=None,
+                        help="Drop stale frames to keep latency low (default: only for cameras)")
+    parser.add_argument('--profile', action='store_true', help="Time each stage and print a summary")
+    parser.add_argument('--cprofile', type=int, metavar='FRAMES',
+                        help=f"Run cProfile on the effect thread for the first frames, saved to {PROFILE_STATS}")
+    args = parser.parse_args()
     
-    # Show result
-    cv2.imshow('Block Art Generator', blocky)
+    mode = args.mode
+    profiler.enabled = args.profile or PROFILE
+    if args.cprofile:
+        profile_request = args.cprofile
+    try:
+        source = open_source(args.source, args.frames, args.fps)
+    except OSError as exc:
+        parser.error(str(exc))
+    drop = args.source.isdigit() if args.drop is None else args.drop
+    sink = VideoFileSink(args.output) if args.output else DisplaySink()
+    stats = Pipeline(source, sink, queue_size=args.queue_size, drop=drop).run()
     
-    # Handle key presses
-    key = cv2.waitKey(1)
-    if key == 27:  # ESC
-        break
-    elif key == ord('m'):
-        mode = (mode + 1) % 3
-
-cap.release()
-cv2.destroyAllWindows()
\ No newline at end of file
+    print(f"{stats['shown']} frames in {stats['seconds']:.2f} s ({stats['fps']:.1f} fps), "
+          f"latency {stats['latency_ms_mean']:.1f} ms mean / {stats['latency_ms_p95']:.1f} ms p95, "
+          f"dropped {stats['dropped_captured']} captured / {stats['dropped_processed']} processed")
+    if profiler.enabled:
+        print("\n".join(profiler.summary_lines()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Simulation engines shared by the 2D, 3D and sandbox frontends
+
+Importing this package only needs numpy: no window, pygame or OpenGL is
+touched, so it is cheap to load from tests, benchmarks and batch jobs.
+"""
+from .chunked import ChunkedSimulation
+from .core import Simulation
+from .dense import DenseSimulation
+from .packed import PackedSimulation
+from .profiling import Profiler
+from .recording import Recorder, Replay
+from .rules import CONWAY, Rule
+from .sparse import SparseSimulation
+from .stats import StatsCollector
+
+BACKENDS = {
+    'dense': DenseSimulation,
+    'sparse': SparseSimulation,
+    'packed': PackedSimulation,
+    'chunked': ChunkedSimulation,
+}
+
+def make_simulation(backend, shape, rule='B3/S23', wrap=False, seed=None, **options):
+    """Create a simulation with the named backend"""
+    try:
+        cls = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {', '.join(BACKENDS)}") from None
+    return cls(shape, rule, wrap, seed, **options)
+
+__all__ = [
+    'BACKENDS',
+    'CONWAY',
+    'ChunkedSimulation',
+    'DenseSimulation',
+    'PackedSimulation',
+    'Profiler',
+    'Recorder',
+    'Replay',
+    'Rule',
+    'Simulation',
+    'SparseSimulation',
+    'StatsCollector',
+    'make_simulation',
+]
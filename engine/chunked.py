@@ -0,0 +1,123 @@
+import numpy as np
+
+from .dense import DenseSimulation, box_sum, face_buffers, wrap_edges
+
+def corner(scratch, shape):
+    """The leading corner of a scratch array with the given shape"""
+    return scratch[tuple(slice(0, n) for n in shape)]
+
+class ChunkedSimulation(DenseSimulation):
+    """Dense board split into square chunks, stepping only chunks that can change
+
+    A chunk can only change if it or one of its neighbor chunks changed in
+    the previous generation, so still regions cost nothing per step. Only
+    those chunks are written to the back buffer: every other chunk stayed
+    the same for the last two generations, so the back buffer already
+    holds it. Chunks are stepped in scratch arrays the size of one chunk,
+    and flips outside the stepped chunks are cleared as they go still, so
+    the change set comes out of the same lazily read flips as the dense one.
+    """
+    def __init__(self, shape, rule='B3/S23', wrap=False, seed=None, chunk=64):
+        super().__init__(shape, rule, wrap, seed)
+        self.chunk = chunk
+        chunks = [-(-size // chunk) for size in self.shape]
+        self.active = np.ones(chunks, dtype=bool)
+        self.changed_chunks = np.zeros(chunks, dtype=bool)
+        self.todo = np.zeros(chunks, dtype=bool)
+        self.stepped = np.zeros(chunks, dtype=bool)  # Chunks whose flips the last step wrote
+
+        # A padded copy of the active chunks, box-summed to find their neighbors
+        self.near = np.zeros([n + 2 for n in chunks], dtype=np.uint8)
+        self.near_interior = self.near[(slice(1, -1),) * len(chunks)]
+        self.near_faces = face_buffers(self.near)
+        self.near_sums = []
+        size = list(self.near.shape)
+        for axis in range(len(chunks)):
+            size[axis] -= 2
+            self.near_sums.append(np.empty(size, dtype=np.uint8))
+
+        # One chunk's worth of the dense step's scratch arrays
+        window = [min(chunk, n) + 2 for n in self.shape]
+        self.chunk_sums = []
+        for axis, out in enumerate(self.sums):
+            window[axis] -= 2
+            self.chunk_sums.append(np.empty(window, dtype=out.dtype))
+        self.chunk_scaled = np.empty(window, dtype=self.scaled.dtype)
+        self.chunk_index = np.empty(window, dtype=np.intp)
+        self.chunk_block = np.empty(window, dtype=np.uint8)
+
+    def find_todo(self):
+        """Mark the active chunks and their neighbors in todo"""
+        np.copyto(self.near_interior, self.active)
+        if self.wrap:
+            wrap_edges(self.near, self.near_faces)
+        np.greater(box_sum(self.near, self.near_sums), 0, out=self.todo)
+
+    def step_chunk(self, region):
+        """Write the next state of one chunk to the back buffer and its flips, returning whether it changed"""
+        # The padded window is offset by one, so [lo, hi + 2) covers the halo
+        window = self.padded[tuple(slice(r.start, r.stop + 2) for r in region)]
+        shape = tuple(r.stop - r.start for r in region)
+        size = list(window.shape)
+        sums = []
+        for axis, out in enumerate(self.chunk_sums):
+            size[axis] -= 2
+            sums.append(corner(out, size))
+
+        index = box_sum(window, sums)
+        scaled = corner(self.chunk_scaled, shape)
+        np.multiply(window[(slice(1, -1),) * len(shape)], self.neighbors, out=scaled)
+        np.add(index, scaled, out=index)
+        cells = corner(self.chunk_index, shape)
+        np.copyto(cells, index)
+        block = corner(self.chunk_block, shape)
+        np.take(self.lut, cells, out=block, mode='clip')
+        np.copyto(self.back[region], block)
+
+        flips = self.flips[region]
+        np.not_equal(block, self.grid[region], out=flips)
+        return int(np.count_nonzero(flips))
+
+    def step_once(self):
+        self.fill_padded()
+        self.find_todo()
+        changed_chunks = self.changed_chunks
+        changed_chunks.fill(False)
+        self.changed = 0
+        for index in np.ndindex(*self.todo.shape):
+            region = tuple(slice(i * self.chunk, min((i + 1) * self.chunk, size))
+                           for i, size in zip(index, self.shape))
+            if self.todo[index]:
+                changed = self.step_chunk(region)
+                changed_chunks[index] = changed > 0
+                self.changed += changed
+            elif self.stepped[index]:
+                # Left out this time, so it has no flips left
+                self.flips[region] = False
+        np.copyto(self.stepped, self.todo)
+
+        self.change_set = None
+        self.grid, self.back = self.back, self.grid
+        self.active, self.changed_chunks = changed_chunks, self.active
+
+    @property
+    def state(self):
+        # A read-only view of the front buffer: a write to it would not wake
+        # its chunk or reach the back buffer, so edits go through load and toggle
+        view = self.grid.view()
+        view.flags.writeable = False
+        return view
+
+    def load(self, cells):
+        super().load(cells)
+        # Both buffers have to agree outside the chunks the next step writes
+        np.copyto(self.back, self.grid)
+        self.active[...] = True
+
+    def toggle(self, index):
+        super().toggle(index)
+        self.active[tuple(np.asarray(index) // self.chunk)] = True
+
+    @property
+    def active_chunks(self):
+        return int(np.count_nonzero(self.active))
@@ -0,0 +1,114 @@
+import numpy as np
+
+from .rules import Rule
+
+NO_CELLS = np.empty(0, dtype=np.int64)
+
+class Simulation:
+    """Interface shared by every engine backend
+
+    A simulation owns a board of the given shape, steps it under a rule and
+    hands out its state as a dense uint8 array (1 for live cells). Backends
+    implement step_once, the state property and load; everything else is
+    built on those.
+
+    Each step also leaves its change set behind: births and deaths hold the
+    flat indices of the cells that came to life or died in the last
+    generation, so renderers and collectors can follow the board in
+    O(changes). Edits made outside step (load, toggle, randomize...) bump
+    edits instead; a consumer that remembers stamp can ask delta_applies()
+    whether the last change set takes its view to the current board, and
+    rebuild from state when it does not.
+    """
+    def __init__(self, shape, rule='B3/S23', wrap=False, seed=None):
+        self.shape = tuple(shape)
+        # None for engines with fixed physics instead of a birth/survival rule
+        self.rule = Rule.parse(rule) if rule is not None else None
+        self.wrap = wrap
+        self.generation = 0
+        self.changed = 0  # Cells that changed in the last generation
+        self.change_set = NO_CELLS, NO_CELLS
+        self.edits = 0  # Changes made outside step
+        self.observers = []  # Called with the simulation after every generation
+        self.reseed(seed)
+
+    def reseed(self, seed=None):
+        """Restart the random stream so randomize() replays exactly"""
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
+    def step(self, n=1):
+        """Advance n generations"""
+        for _ in range(n):
+            self.step_once()
+            self.generation += 1
+            for observer in self.observers:
+                observer(self)
+        return self
+
+    def step_once(self):
+        raise NotImplementedError
+
+    def set_changes(self, births, deaths):
+        self.change_set = births, deaths
+        self.changed = len(births) + len(deaths)
+
+    def changes(self):
+        """Births and deaths of the last generation"""
+        return self.change_set
+
+    @property
+    def births(self):
+        return self.changes()[0]
+
+    @property
+    def deaths(self):
+        return self.changes()[1]
+
+    @property
+    def changed_cells(self):
+        """Flat indices of every cell that changed in the last generation"""
+        return np.concatenate((self.births, self.deaths))
+
+    @property
+    def stamp(self):
+        return self.generation, self.edits
+
+    def delta_applies(self, stamp):
+        """Whether the last change set takes the board as of stamp to the current one"""
+        if stamp is None:
+            return False
+        generation, edits = stamp
+        return edits == self.edits and generation + 1 == self.generation
+
+    @property
+    def state(self):
+        """The board as a dense uint8 array"""
+        raise NotImplementedError
+
+    def load(self, cells):
+        """Replace the board with the given array of live (non-zero) cells"""
+        raise NotImplementedError
+
+    @property
+    def population(self):
+        return int(np.count_nonzero(self.state))
+
+    def randomize(self, density=0.5):
+        """Fill the board at random with the given share of live cells"""
+        self.load(self.rng.random(self.shape) < density)
+        self.generation = 0
+
+    def add_noise(self, density):
+        """Bring a random share of cells to life without killing any"""
+        self.load((self.state != 0) | (self.rng.random(self.shape) < density))
+
+    def clear(self):
+        self.load(np.zeros(self.shape, dtype=np.uint8))
+        self.generation = 0
+
+    def toggle(self, index):
+        """Flip one cell between live and dead"""
+        cells = self.state.copy()
+        cells[index] = 1 - cells[index]
+        self.load(cells)
@@ -0,0 +1,119 @@
+import numpy as np
+
+from .core import Simulation
+
+def face_buffers(padded):
+    """One scratch array per axis, shaped like the faces of padded across that axis"""
+    return [np.empty(padded.shape[:axis] + padded.shape[axis + 1:], dtype=padded.dtype)
+            for axis in range(padded.ndim)]
+
+def wrap_edges(padded, faces):
+    """Copy the far edges of a padded board into its border, in place
+
+    Going one axis at a time over the whole width of the others, borders
+    filled earlier carry over, so the corners wrap too. Edges go through the
+    face_buffers: copying between two faces of the same array directly would
+    make numpy take a temporary copy, as their memory interleaves.
+    """
+    for axis, face in enumerate(faces):
+        lead = (slice(None),) * axis
+        np.copyto(face, padded[lead + (-2,)])
+        np.copyto(padded[lead + (0,)], face)
+        np.copyto(face, padded[lead + (1,)])
+        np.copyto(padded[lead + (-1,)], face)
+
+def box_sum(padded, sums):
+    """3x3(x3...) box sums over a board padded by one cell, written into one
+    preallocated array per axis; the last one is returned
+
+    The box sum is separable, so it takes two adds per axis instead of one
+    per neighbor, in any number of dimensions. Each sum counts the cell
+    itself along with its neighbors.
+    """
+    total = padded
+    for axis, out in enumerate(sums):
+        n = total.shape[axis]
+        take = lambda start: total[(slice(None),) * axis + (slice(start, start + n - 2),)]
+        np.add(take(0), take(1), out=out)
+        np.add(out, take(2), out=out)
+        total = out
+    return total
+
+class DenseSimulation(Simulation):
+    """Whole board as one uint8 array, stepped with array arithmetic
+
+    Works in any number of dimensions and is the reference the other
+    backends are checked against. The board lives in two preallocated
+    buffers that swap roles every generation, and the step works in scratch
+    arrays made once up front, so stepping allocates nothing. The change set
+    is only turned into index arrays when someone asks for it.
+    """
+    def __init__(self, shape, rule='B3/S23', wrap=False, seed=None):
+        super().__init__(shape, rule, wrap, seed)
+        self.neighbors = 3 ** len(self.shape) - 1
+        self.table = self.rule.table(self.neighbors)
+        # Row-major table, so cell * (neighbors + 1) + count picks an entry
+        self.lut = self.table.ravel()
+        self.grid = np.zeros(self.shape, dtype=np.uint8)
+        self.back = np.zeros(self.shape, dtype=np.uint8)
+        
+        # Box sums count the cell itself; adding cell * neighbors on top gives
+        # the table index, which needs 16 bits past four dimensions
+        dtype = np.uint8 if 2 * self.neighbors + 1 < 256 else np.uint16
+        self.padded = np.zeros([size + 2 for size in self.shape], dtype=np.uint8)
+        self.interior = self.padded[(slice(1, -1),) * len(self.shape)]
+        self.faces = face_buffers(self.padded)
+        self.sums = []
+        size = list(self.padded.shape)
+        for axis in range(len(self.shape)):
+            size[axis] -= 2
+            self.sums.append(np.empty(size, dtype=dtype))
+        self.scaled = np.empty(self.shape, dtype=dtype)
+        self.index = np.empty(self.shape, dtype=np.intp)  # take() would convert anything else
+        self.flips = np.zeros(self.shape, dtype=bool)
+
+    def fill_padded(self):
+        """Copy the board into the middle of the padded buffer and fill its border"""
+        np.copyto(self.interior, self.grid)
+        if self.wrap:
+            wrap_edges(self.padded, self.faces)
+
+    def step_once(self):
+        self.fill_padded()
+        index = box_sum(self.padded, self.sums)
+        np.multiply(self.interior, self.neighbors, out=self.scaled)
+        np.add(index, self.scaled, out=index)
+        np.copyto(self.index, index)
+        np.take(self.lut, self.index, out=self.back, mode='clip')
+        
+        np.not_equal(self.grid, self.back, out=self.flips)
+        self.changed = int(np.count_nonzero(self.flips))
+        self.change_set = None
+        self.grid, self.back = self.back, self.grid
+
+    def changes(self):
+        # Worked out on first use from the flips the step left behind
+        if self.change_set is None:
+            flips = np.flatnonzero(self.flips)
+            born = self.grid.ravel()[flips] != 0
+            self.change_set = flips[born], flips[~born]
+        return self.change_set
+
+    @property
+    def state(self):
+        # The live front buffer: writes to it change the board, and the
+        # step after next overwrites it
+        return self.grid
+
+    def load(self, cells):
+        cells = np.asarray(cells)
+        if cells.shape != self.shape:
+            raise ValueError(f"Expected cells of shape {self.shape}, got {cells.shape}")
+        self.changes()  # Settle the last step's change set before the board moves on
+        np.copyto(self.grid, cells != 0)
+        self.edits += 1
+
+    def toggle(self, index):
+        self.changes()
+        self.grid[index] ^= 1
+        self.edits += 1
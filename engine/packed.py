@@ -0,0 +1,169 @@
+import numpy as np
+
+from .core import Simulation
+
+WORD_BITS = 64
+ONE = np.uint64(1)
+HIGH_BIT = np.uint64(WORD_BITS - 1)
+ALL_BITS = ~np.uint64(0)
+
+# Scratch planes one step adds its neighbor counts in
+PLANES = ('west', 'east', 'partial', 'ones', 'twos', 'above_ones', 'above_twos', 'below_ones', 'below_twos',
+          'mid_ones', 'mid_twos', 'bit0', 'carry', 'twos_sum', 'fours', 'bit1', 'carry2', 'bit2', 'bit3',
+          'not_bit0', 'not_bit1', 'not_bit2', 'not_bit3', 'dead', 'match')
+
+def half_add(a, b, total, carry):
+    """Add bit planes a and b into total and carry; carry must not be a or b"""
+    np.bitwise_and(a, b, out=carry)
+    np.bitwise_xor(a, b, out=total)
+    return total, carry
+
+def full_add(a, b, c, total, carry, partial):
+    """Add bit planes a, b and c into total and carry, using partial as scratch"""
+    np.bitwise_xor(a, b, out=partial)
+    np.bitwise_xor(partial, c, out=total)
+    np.bitwise_and(a, b, out=carry)
+    np.bitwise_and(c, partial, out=partial)
+    np.bitwise_or(carry, partial, out=carry)
+    return total, carry
+
+def popcount(words, out=None):
+    """Set bits in words, counted per word into out (an integer array like words) where numpy can"""
+    if hasattr(np, 'bitwise_count'):  # numpy 2
+        return int(np.bitwise_count(words, out=out).sum())
+    return int(np.unpackbits(words.view(np.uint8)).sum())
+
+def set_bits(words, cols):
+    """Flat indices of the set bits of a (rows, words) array, touching only non-zero words"""
+    rows, columns = np.nonzero(words)
+    bits = np.unpackbits(words[rows, columns].astype('<u8').view(np.uint8).reshape(-1, 8),
+                         axis=1, bitorder='little')
+    hit, bit = np.nonzero(bits)
+    return rows[hit] * cols + columns[hit] * WORD_BITS + bit
+
+class PackedSimulation(Simulation):
+    """2D board with 64 cells packed into each uint64 word
+
+    Column c of a row lives in bit c % 64 of word c // 64. The eight
+    neighbor counts are added bit-parallel with full adders into four bit
+    planes, so one word operation updates 64 cells. Like the dense backend
+    it swaps two boards every generation and adds into scratch planes made
+    up front, and only turns the change set into indices when asked.
+    """
+    def __init__(self, shape, rule='B3/S23', wrap=False, seed=None):
+        super().__init__(shape, rule, wrap, seed)
+        if len(self.shape) != 2:
+            raise ValueError("The packed backend only runs 2D boards")
+        self.rows, self.cols = self.shape
+        self.words = -(-self.cols // WORD_BITS)
+        self.bits = np.zeros((self.rows, self.words), dtype=np.uint64)
+        self.back = np.zeros_like(self.bits)
+        self.planes = {name: np.empty_like(self.bits) for name in PLANES}
+        self.counts = np.empty_like(self.bits)
+        # Bits past the last column must stay dead
+        used = self.cols - (self.words - 1) * WORD_BITS
+        self.last_mask = np.uint64((1 << used) - 1)
+        self.last_bit = np.uint64(used - 1)
+
+    def shift_columns(self, x, west, east, scratch):
+        """Each cell's west and east neighbor, as words lined up with x"""
+        # Bits crossing into the next word are shifted over the flat board, where
+        # the slices stay contiguous; the first and last column are then set
+        # to the wrapped bits or cleared
+        carry = scratch.reshape(-1)
+        np.left_shift(x, ONE, out=west)
+        np.right_shift(x.reshape(-1)[:-1], HIGH_BIT, out=carry[1:])
+        if self.wrap:
+            np.right_shift(x[:, -1], self.last_bit, out=scratch[:, 0])
+            np.bitwise_and(scratch[:, 0], ONE, out=scratch[:, 0])
+        else:
+            scratch[:, 0] = 0
+        np.bitwise_or(west, scratch, out=west)
+        
+        np.right_shift(x, ONE, out=east)
+        np.left_shift(x.reshape(-1)[1:], HIGH_BIT, out=carry[:-1])
+        if self.wrap:
+            np.bitwise_and(x[:, 0], ONE, out=scratch[:, -1])
+            np.left_shift(scratch[:, -1], self.last_bit, out=scratch[:, -1])
+        else:
+            scratch[:, -1] = 0
+        np.bitwise_or(east, scratch, out=east)
+        east[:, -1] &= self.last_mask
+        return west, east
+
+    def shift_rows(self, x, down, out):
+        """Each cell's neighbor in the row above (down=True) or below"""
+        if down:
+            np.copyto(out[1:], x[:-1])
+            out[0] = x[-1] if self.wrap else 0
+        else:
+            np.copyto(out[:-1], x[1:])
+            out[-1] = x[0] if self.wrap else 0
+        return out
+
+    def step_once(self):
+        x, new_bits, p = self.bits, self.back, self.planes
+        west, east = self.shift_columns(x, p['west'], p['east'], p['partial'])
+        
+        # Each row of three neighbors adds to a two-bit number; the middle
+        # row has only two since the cell itself does not count
+        ones, twos = full_add(west, x, east, p['ones'], p['twos'], p['partial'])
+        above_ones, above_twos = self.shift_rows(ones, True, p['above_ones']), self.shift_rows(twos, True, p['above_twos'])
+        below_ones, below_twos = self.shift_rows(ones, False, p['below_ones']), self.shift_rows(twos, False, p['below_twos'])
+        mid_ones, mid_twos = half_add(west, east, p['mid_ones'], p['mid_twos'])
+        
+        # Add the three two-bit numbers into four bit planes (counts 0-8)
+        bit0, carry = full_add(above_ones, mid_ones, below_ones, p['bit0'], p['carry'], p['partial'])
+        twos, fours = full_add(above_twos, mid_twos, below_twos, p['twos_sum'], p['fours'], p['partial'])
+        bit1, carry = half_add(twos, carry, p['bit1'], p['carry2'])
+        bit2, bit3 = half_add(fours, carry, p['bit2'], p['bit3'])
+        planes = (bit0, bit1, bit2, bit3)
+        inverses = tuple(np.invert(plane, out=p[f'not_bit{i}']) for i, plane in enumerate(planes))
+        dead = np.invert(x, out=p['dead'])
+        
+        new_bits.fill(0)
+        match = p['match']
+        for count in range(9):
+            born, survive = count in self.rule.birth, count in self.rule.survive
+            if not (born or survive):
+                continue
+            match.fill(ALL_BITS)
+            for i in range(4):
+                np.bitwise_and(match, planes[i] if count >> i & 1 else inverses[i], out=match)
+            if born and not survive:
+                np.bitwise_and(match, dead, out=match)
+            elif survive and not born:
+                np.bitwise_and(match, x, out=match)
+            np.bitwise_or(new_bits, match, out=new_bits)
+        new_bits[:, -1] &= self.last_mask
+        
+        self.changed = popcount(np.bitwise_xor(new_bits, x, out=match), self.counts)
+        self.change_set = None
+        self.bits, self.back = new_bits, x
+
+    def changes(self):
+        # Worked out on first use from the two boards the step left behind
+        if self.change_set is None:
+            new_bits, old_bits = self.bits, self.back
+            self.change_set = set_bits(new_bits & ~old_bits, self.cols), set_bits(old_bits & ~new_bits, self.cols)
+        return self.change_set
+
+    @property
+    def state(self):
+        # A fresh array: writes to it do not change the board
+        cells = np.unpackbits(self.bits.astype('<u8').view(np.uint8), axis=1, bitorder='little')
+        return cells[:, :self.cols]
+
+    def load(self, cells):
+        cells = np.asarray(cells)
+        if cells.shape != self.shape:
+            raise ValueError(f"Expected cells of shape {self.shape}, got {cells.shape}")
+        packed = np.zeros((self.rows, self.words * 8), dtype=np.uint8)
+        packed[:, :-(-self.cols // 8)] = np.packbits(cells != 0, axis=1, bitorder='little')
+        self.changes()  # Settle the last step's change set before the board moves on
+        np.copyto(self.bits, packed.view('<u8'))
+        self.edits += 1
+
+    @property
+    def population(self):
+        return popcount(self.bits)
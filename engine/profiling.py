@@ -0,0 +1,163 @@
+"""Lightweight instrumentation for the frontends' main loops
+
+    profiler = Profiler(enabled=True)
+    with profiler.timer('step'):
+        simulation.step()
+    profiler.count('live', simulation.population)
+    profiler.end_frame()
+
+Timers and counters collect into the current frame; end_frame() pushes it
+onto a ring buffer of recent frames that summary(), summary_lines() and
+dump() read from. When disabled, timer() hands back one shared do-nothing
+context manager and count()/end_frame() return at once, so the hooks can
+stay in hot loops.
+
+A profiler is not thread-safe. Stages on other threads keep their own and
+hand each closed frame to the thread that owns the main one, which merges
+it in:
+
+    sample = stage_profiler.end_frame()  # on the stage's thread
+    profiler.merge(sample, stage_profiler.timers)  # on the main thread
+"""
+import collections
+import cProfile
+import io
+import json
+import pstats
+import time
+
+class NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_TIMER = NullTimer()
+
+class Timer:
+    """Adds the time spent inside its with-block to the profiler's current frame"""
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        frame = self.profiler.frame
+        frame[self.name] = frame.get(self.name, 0.0) + (time.perf_counter() - self.start) * 1000
+        return False
+
+class Profiler:
+    """Named phase timers (in ms), counters and a ring buffer of frame samples"""
+    def __init__(self, enabled=False, history=300):
+        self.enabled = enabled
+        self.samples = collections.deque(maxlen=history)
+        self.frame = {}
+        self.timers = {}
+        self.frames = 0
+        self.cprofile = None
+        self.cprofile_left = 0
+        self.cprofile_path = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.frame = {}
+        return self.enabled
+
+    def timer(self, name):
+        if not self.enabled:
+            return NULL_TIMER
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = Timer(self, name)
+        return timer
+
+    def count(self, name, value):
+        if self.enabled:
+            self.frame[name] = value
+
+    def end_frame(self):
+        """Close the current frame's sample and advance any cProfile run
+
+        Returns the sample, or None when disabled.
+        """
+        self.frames += 1
+        if self.cprofile is not None:
+            self.cprofile_left -= 1
+            if self.cprofile_left <= 0:
+                self.finish_cprofile()
+        if not self.enabled:
+            return None
+        sample = self.frame
+        sample['frame'] = self.frames
+        self.samples.append(sample)
+        self.frame = {}
+        return sample
+
+    def merge(self, sample, timers=()):
+        """Add a sample closed by another profiler to the current frame
+
+        Names in timers are timings and add up with this frame's own; the
+        rest are counters and replace them.
+        """
+        if not self.enabled or not sample:
+            return
+        for name, value in sample.items():
+            if name == 'frame':
+                continue
+            if name in timers:
+                if name not in self.timers:
+                    self.timers[name] = Timer(self, name)
+                self.frame[name] = self.frame.get(name, 0.0) + value
+            else:
+                self.frame[name] = value
+
+    def summary(self):
+        """Mean and max of every timer and counter over the buffered frames"""
+        values = collections.defaultdict(list)
+        for sample in self.samples:
+            for name, value in sample.items():
+                if name != 'frame':
+                    values[name].append(value)
+        return {name: {'mean': sum(v) / len(v), 'max': max(v)} for name, v in values.items()}
+
+    def summary_lines(self):
+        """Short text lines for an on-screen overlay"""
+        lines = []
+        for name, stats in sorted(self.summary().items()):
+            if name in self.timers:
+                lines.append(f"{name}: {stats['mean']:.2f} ms (max {stats['max']:.2f})")
+            else:
+                lines.append(f"{name}: {stats['mean']:.0f} (max {stats['max']:.0f})")
+        return lines
+
+    def dump(self, path):
+        """Write the buffered frame samples and their summary to a JSON file"""
+        with open(path, 'w') as f:
+            json.dump({'summary': self.summary(), 'samples': list(self.samples)}, f, indent=1)
+
+    def profile_frames(self, frames, path=None):
+        """Run cProfile on the calling thread for the next frames, then report
+
+        The stats are written to path (for pstats or snakeviz) if given, and
+        the top functions by cumulative time are printed.
+        """
+        if self.cprofile is not None:
+            return
+        self.cprofile = cProfile.Profile()
+        self.cprofile_left = frames
+        self.cprofile_path = path
+        self.cprofile.enable()
+
+    def finish_cprofile(self):
+        self.cprofile.disable()
+        if self.cprofile_path:
+            self.cprofile.dump_stats(self.cprofile_path)
+        out = io.StringIO()
+        pstats.Stats(self.cprofile, stream=out).sort_stats('cumulative').print_stats(20)
+        print(out.getvalue())
+        self.cprofile = None
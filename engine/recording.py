@@ -0,0 +1,214 @@
+"""Recording simulation runs to a file and replaying them with seeking
+
+    with Recorder('run.rec', simulation) as recorder:
+        for _ in range(1000):
+            simulation.step()
+            recorder.capture()
+
+    with Replay('run.rec') as replay:
+        cells = replay.seek(750)
+
+A recording is a header followed by frames. Every keyframe_interval-th
+frame is a keyframe holding the whole board; the frames between hold the
+XOR with the frame before, which is mostly zeros and compresses well. Boards
+of live/dead cells are bit-packed first. capture() only copies the board;
+XOR, compression and writing happen on a background thread. Replay scans the
+frame headers once, then seeks by decoding forward from the nearest keyframe
+(or from the frame it is already on, when that is closer).
+"""
+import bisect
+import json
+import queue
+import struct
+import threading
+import zlib
+
+import numpy as np
+
+MAGIC = b'LIFEREC1'
+FRAME = struct.Struct('<BqI')  # Kind, generation, payload length
+KEYFRAME, DELTA = 0, 1
+
+class Recorder:
+    """Appends frames of a simulation to a recording from a writer thread"""
+    def __init__(self, path, simulation, keyframe_interval=100, level=1, queue_size=64, meta=None):
+        self.simulation = simulation
+        self.shape = simulation.shape
+        # Live/dead boards pack 8 cells per byte; sandbox materials do not fit a bit
+        self.packed = simulation.rule is not None
+        self.keyframe_interval = keyframe_interval
+        self.level = level
+        self.frames = 0
+        self.bytes_written = 0
+        self.error = None
+        self.stamp = None
+
+        self.file = open(path, 'wb')
+        header = json.dumps({
+            'shape': self.shape,
+            'packed': self.packed,
+            'keyframe_interval': keyframe_interval,
+            'meta': meta or {},
+        }).encode()
+        self.write(MAGIC + struct.pack('<I', len(header)) + header)
+
+        # Bounded, so a writer that falls behind slows capture down instead of
+        # queueing boards without limit
+        self.queue = queue.Queue(queue_size)
+        self.thread = threading.Thread(target=self.writer_loop, daemon=True)
+        self.thread.start()
+
+    def write(self, data):
+        self.file.write(data)
+        self.bytes_written += len(data)
+
+    def capture(self):
+        """Queue the simulation's current board as the next frame
+
+        Does nothing when the board has not moved on since the last capture,
+        so frontends can call it every frame, paused or not.
+        """
+        if self.error is not None:
+            raise self.error
+        if self.simulation.stamp == self.stamp:
+            return False
+        self.stamp = self.simulation.stamp
+        state = self.simulation.state
+        frame = np.packbits(state) if self.packed else state.ravel().copy()
+        self.queue.put((self.simulation.generation, frame))
+        self.frames += 1
+        return True
+
+    def writer_loop(self):
+        previous = None
+        index = 0
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    break
+                generation, frame = item
+                if index % self.keyframe_interval == 0:
+                    kind, data = KEYFRAME, frame
+                else:
+                    kind, data = DELTA, frame ^ previous
+                payload = zlib.compress(data.tobytes(), self.level)
+                self.write(FRAME.pack(kind, generation, len(payload)) + payload)
+                previous = frame
+                index += 1
+        except Exception as exc:
+            self.error = exc
+            # Keep draining so capture() never blocks on a dead writer
+            while self.queue.get() is not None:
+                pass
+
+    def close(self):
+        """Write out the queued frames and close the file"""
+        if self.file.closed:
+            return
+        self.queue.put(None)
+        self.thread.join()
+        self.file.close()
+        if self.error is not None:
+            raise self.error
+
+    @property
+    def bytes_per_frame(self):
+        return self.bytes_written / self.frames if self.frames else 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+class Replay:
+    """Random access to the frames of a recording
+
+    Frames are numbered from 0 in the order they were captured; generations
+    holds the simulation generation each one was taken at.
+    """
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        if self.file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a simulation recording")
+        length, = struct.unpack('<I', self.file.read(4))
+        header = json.loads(self.file.read(length))
+        self.shape = tuple(header['shape'])
+        self.packed = header['packed']
+        self.keyframe_interval = header['keyframe_interval']
+        self.meta = header['meta']
+        self.size = int(np.prod(self.shape))
+
+        # One pass over the frame headers; a frame cut short by a crash ends the recording
+        self.offsets, self.kinds, self.generations = [], [], []
+        self.keyframes = []
+        start = self.file.tell()
+        end = self.file.seek(0, 2)
+        self.file.seek(start)
+        while True:
+            head = self.file.read(FRAME.size)
+            if len(head) < FRAME.size:
+                break
+            kind, generation, length = FRAME.unpack(head)
+            offset = self.file.tell()
+            if offset + length > end:
+                break
+            self.file.seek(length, 1)
+            if kind == KEYFRAME:
+                self.keyframes.append(len(self.offsets))
+            self.offsets.append((offset, length))
+            self.kinds.append(kind)
+            self.generations.append(generation)
+
+        self.position = None  # Frame the buffer holds
+        self.buffer = None
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def payload(self, index):
+        offset, length = self.offsets[index]
+        self.file.seek(offset)
+        return np.frombuffer(zlib.decompress(self.file.read(length)), dtype=np.uint8)
+
+    def seek(self, index):
+        """The board at the given frame, as a fresh uint8 array"""
+        if not 0 <= index < len(self):
+            raise IndexError(f"Frame {index} is out of range for {len(self)} frames")
+        key = self.keyframes[bisect.bisect_right(self.keyframes, index) - 1]
+        if self.position is None or not key <= self.position <= index:
+            self.buffer = self.payload(key).copy()
+            self.position = key
+        while self.position < index:
+            self.position += 1
+            self.buffer ^= self.payload(self.position)
+
+        if self.packed:
+            return np.unpackbits(self.buffer, count=self.size).reshape(self.shape)
+        return self.buffer.reshape(self.shape).copy()
+
+    def find(self, generation):
+        """Index of the last frame taken at the given generation"""
+        for index in range(len(self) - 1, -1, -1):
+            if self.generations[index] == generation:
+                return index
+        raise KeyError(f"No frame at generation {generation}")
+
+    def __getitem__(self, index):
+        return self.seek(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.seek(index)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
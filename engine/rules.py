@@ -0,0 +1,49 @@
+import numpy as np
+
+class Rule:
+    """Outer-totalistic birth/survival rule, written like B3/S23
+
+    Neighbor counts above 9 (3D has up to 26 neighbors) are written with
+    commas, as in B5,6,7/S4,5,6,10.
+    """
+    def __init__(self, birth, survive):
+        self.birth = frozenset(birth)
+        self.survive = frozenset(survive)
+
+    @classmethod
+    def parse(cls, text):
+        if isinstance(text, Rule):
+            return text
+        parts = {}
+        for part in text.upper().split('/'):
+            kind, digits = part[:1], part[1:]
+            if kind not in 'BS' or kind in parts:
+                raise ValueError(f"Bad rule {text!r}, expected something like B3/S23")
+            if ',' in digits:
+                parts[kind] = {int(d) for d in digits.split(',') if d}
+            else:
+                parts[kind] = {int(d) for d in digits}
+        return cls(parts.get('B', ()), parts.get('S', ()))
+
+    def table(self, max_neighbors):
+        """Lookup of the next state indexed by [current state, live neighbor count]"""
+        table = np.zeros((2, max_neighbors + 1), dtype=np.uint8)
+        table[0, [n for n in self.birth if n <= max_neighbors]] = 1
+        table[1, [n for n in self.survive if n <= max_neighbors]] = 1
+        return table
+
+    def __eq__(self, other):
+        return isinstance(other, Rule) and (self.birth, self.survive) == (other.birth, other.survive)
+
+    def __hash__(self):
+        return hash((self.birth, self.survive))
+
+    def __str__(self):
+        sep = ',' if max(self.birth | self.survive, default=0) > 9 else ''
+        return 'B' + sep.join(map(str, sorted(self.birth))) + '/S' + sep.join(map(str, sorted(self.survive)))
+
+    def __repr__(self):
+        return f"Rule.parse({str(self)!r})"
+
+# Conway's Game of Life
+CONWAY = Rule.parse('B3/S23')
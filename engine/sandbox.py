@@ -0,0 +1,470 @@
+from concurrent.futures import ThreadPoolExecutor
+from enum import IntEnum
+from functools import lru_cache
+
+import numpy as np
+
+from .core import NO_CELLS, Simulation
+
+class CellState(IntEnum):
+    EMPTY = 0
+    SAND = 1
+    WATER = 2
+    PLANT = 3
+    FIRE = 4
+    LAVA = 5
+    STONE = 6
+
+# Orthogonal neighbors first, then diagonals
+NEIGHBOR_DIRS = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
+
+# The six orderings of a three-way choice, indexed by the per-frame "order" roll
+ORDERS_3 = ((0, 1, 2), (0, 2, 1), (1, 0, 2), (1, 2, 0), (2, 0, 1), (2, 1, 0))
+
+# Column offset tried at each step of each ordering of down-left, down-right, down
+ORDER_DX = np.array([[(-1, 1, 0)[i] for i in order] for order in ORDERS_3], dtype=np.int8)
+
+# The two orderings that try each column offset at each step, indexed [step][dx + 1]
+ORDERS_TRYING = [[tuple(int(i) for i in np.flatnonzero(ORDER_DX[:, k] == dx)) for dx in (-1, 0, 1)]
+                 for k in range(3)]
+
+# Chance a cell changes given how many neighbors each roll in a frame covers,
+# in float32 like the rolls they are compared with
+GROW_CHANCE = (1 - 0.99 ** np.arange(4)).astype(np.float32)
+SPREAD_CHANCE = (1 - 0.6 ** np.arange(9)).astype(np.float32)
+
+# Every decision one frame of physics rolls for, with how many outcomes it
+# has (None for a uniform float in [0, 1))
+ROLLS = {
+    'order': len(ORDERS_3),
+    'fall_side': 2,
+    'flow_side': 2,
+    'grow': None,
+    'ignite': None,
+    'spread': None,
+    'burnout': None,
+}
+
+def draw_rolls(rng, height, width, out=None):
+    """Draw every random number one frame of physics needs, one array per decision
+
+    Pass the rolls of an earlier frame as out to draw into their arrays
+    instead of allocating new ones.
+    """
+    if out is None:
+        out = {name: np.empty((height, width), dtype=np.float32 if n is None else np.uint8)
+               for name, n in ROLLS.items()}
+    # Whole-number rolls scale a uniform float to the outcomes and truncate,
+    # using a float roll's array before its own turn comes; the clamp guards
+    # against rounding up to n
+    scratch = out['burnout']
+    for name, n in ROLLS.items():
+        if n is not None:
+            rng.random(dtype=np.float32, out=scratch)
+            np.multiply(scratch, n, out=scratch)
+            np.copyto(out[name], scratch, casting='unsafe')
+            np.minimum(out[name], n - 1, out=out[name])
+    for name, n in ROLLS.items():
+        if n is None:
+            rng.random(dtype=np.float32, out=out[name])
+    return out
+
+def count_neighbors(slab, rows, width, out=None):
+    """Count set neighbors of each cell inside a slab padded by one cell on every side"""
+    if out is None:
+        out = np.empty((rows, width), dtype=np.uint8)
+    out.fill(0)
+    for dx, dy in NEIGHBOR_DIRS:
+        np.add(out, slab[1 + dy:1 + dy + rows, 1 + dx:1 + dx + width], out=out)
+    return out
+
+def matches(cells, state, out):
+    """Mask of the cells holding state, written into out"""
+    # As a plain int the state keeps the comparison in uint8; the IntEnum
+    # would widen it to int64 through numpy's cast buffers
+    return np.equal(cells, int(state), out=out)
+
+def band_scratch(rows, width):
+    """Arrays one band of rows works in: the reactions' slab and masks, and
+    masks for every other row, which is what one pass of movement touches"""
+    pass_rows = -(-rows // 2)
+    scratch = {
+        'slab': np.zeros((rows + 2, width + 2), dtype=np.uint8),
+        'hits': np.empty((rows + 2, width + 2), dtype=bool),
+        'counts': np.empty((rows, width), dtype=np.uint8),
+        'fires': np.empty((rows, width), dtype=np.uint8),
+        # Counts are copied to intp to look up chances, as take() would convert anything else
+        'index': np.empty((rows, width), dtype=np.intp),
+        'chance': np.empty((rows, width), dtype=np.float32),
+    }
+    for name in ('plant', 'hot', 'wet', 'mask'):
+        scratch[name] = np.empty((rows, width), dtype=bool)
+    for name in ('free', 'sand', 'lava', 'flow', 'quench', 'moved', 'test'):
+        scratch[name] = np.empty((pass_rows, width), dtype=bool)
+    return scratch
+
+def fit(scratch, like):
+    """The corner of a scratch array with the shape of like"""
+    return scratch[:like.shape[0], :like.shape[1]]
+
+def put(dst, state, mask):
+    """Write a cell state wherever mask is set"""
+    np.copyto(dst, state, casting='unsafe', where=mask)
+
+def shift_src(a, dx):
+    """Columns of a that have a neighbor dx columns away"""
+    if dx < 0:
+        return a[:, 1:]
+    if dx > 0:
+        return a[:, :-1]
+    return a
+
+def shift_dst(a, dx):
+    """Columns of a lined up with shift_src(a, dx) moved dx columns over"""
+    if dx < 0:
+        return a[:, :-1]
+    if dx > 0:
+        return a[:, 1:]
+    return a
+
+@lru_cache(maxsize=None)
+def disk_offsets(radius, inclusive=False):
+    """Row and column offsets of the cells within radius of a center"""
+    r = np.arange(-radius, radius + 1)
+    dy, dx = np.meshgrid(r, r, indexing='ij')
+    dist = dx*dx + dy*dy
+    inside = dist <= radius*radius if inclusive else dist < radius*radius
+    return dy[inside], dx[inside]
+
+class Sandbox(Simulation):
+    """Falling-sand world of CellState cells, stepped in row bands
+
+    The state holds CellState values rather than live/dead cells, and there
+    is no birth/survival rule: the physics are fixed.
+    """
+    def __init__(self, width=200, height=200, seed=None, threads=1, band_height=64):
+        super().__init__((height, width), rule=None, seed=seed)
+        self.width = width
+        self.height = height
+        self.band_height = band_height
+        self.pool = None
+        self.set_threads(threads)
+        self.rolls = None
+        self.changed_indices = NO_CELLS
+        self.material_change = np.zeros(len(CellState), dtype=np.int64)
+        # Front and back worlds, swapped every step, and the step's scratch masks
+        self.grid = np.zeros((height, width), dtype=np.uint8)
+        self.back = np.zeros((height, width), dtype=np.uint8)
+        self.done = np.zeros((height, width), dtype=bool)
+        self.flips = np.zeros((height, width), dtype=bool)
+        bands = self.bands()
+        self.scratch = {(r0, r1): band_scratch(r1 - r0, width) for r0, r1 in bands}
+        # Every band for the reactions, then the even and odd ones for movement
+        self.band_passes = bands, bands[0::2], bands[1::2]
+        self.initialize_grid()
+        self.initialize_random()
+
+    @property
+    def state(self):
+        # The live front buffer: writes to it change the world, and the step
+        # after next overwrites it
+        return self.grid
+
+    def load(self, cells):
+        cells = np.asarray(cells)
+        if cells.shape != self.shape:
+            raise ValueError(f"Expected cells of shape {self.shape}, got {cells.shape}")
+        self.changes()  # Settle the last step's change set before the world moves on
+        np.copyto(self.grid, cells, casting='unsafe')
+        self.edits += 1
+
+    @property
+    def population(self):
+        return int(np.count_nonzero(self.grid))
+
+    def changes(self):
+        # Births and deaths are cells filling up and emptying; changed_cells also
+        # has cells that turned from one material into another. All of it is
+        # worked out on first use from the flips the step left behind
+        if self.change_set is None:
+            changed = np.flatnonzero(self.flips)
+            before, after = self.back.ravel()[changed], self.grid.ravel()[changed]
+            self.changed_indices = changed
+            self.change_set = changed[before == CellState.EMPTY], changed[after == CellState.EMPTY]
+            self.material_change = (np.bincount(after, minlength=len(CellState))
+                                    - np.bincount(before, minlength=len(CellState)))
+        return self.change_set
+
+    @property
+    def changed_cells(self):
+        self.changes()
+        return self.changed_indices
+
+    @property
+    def material_delta(self):
+        """How many cells of each CellState the last step gained or lost"""
+        self.changes()
+        return self.material_change
+
+    def randomize(self, density=None):
+        """Generate a fresh world; the density of features is fixed"""
+        self.changes()
+        self.initialize_grid()
+        self.initialize_random()
+        self.generation = 0
+        self.edits += 1
+
+    def add_noise(self, density):
+        """Scatter a share of random non-empty cells over the world"""
+        self.changes()
+        noise = self.rng.random(self.shape) < density
+        self.grid[noise] = self.rng.integers(1, len(CellState), np.count_nonzero(noise))
+        self.edits += 1
+
+    def toggle(self, index):
+        self.changes()
+        self.grid[index] = CellState.EMPTY if self.grid[index] else CellState.SAND
+        self.edits += 1
+
+    def per_area(self, count):
+        """Scale a feature count tuned for a 200x200 world to this world's size"""
+        return max(count, count * self.width * self.height // (200 * 200))
+
+    def initialize_grid(self):
+        # Create initial patterns
+        self.grid.fill(CellState.EMPTY)
+        rng = self.rng
+        
+        # Create sand dunes
+        n = self.per_area(10)
+        xs, ys = rng.integers(0, self.width, n), rng.integers(0, self.height//2 + 1, n)
+        self.scatter_disks(xs, ys, CellState.SAND, 15, density=0.7)
+        
+        # Create water pools
+        n = self.per_area(5)
+        xs, ys = rng.integers(0, self.width, n), rng.integers(self.height//2, self.height, n)
+        self.scatter_disks(xs, ys, CellState.WATER, 10, density=0.7)
+        
+        # Create plants
+        n = self.per_area(20)
+        xs, ys = rng.integers(0, self.width, n), rng.integers(0, self.height, n)
+        empty = self.grid[ys, xs] == CellState.EMPTY
+        self.grid[ys[empty], xs[empty]] = CellState.PLANT
+        
+        # Create stone formations
+        n = self.per_area(7)
+        xs, ys = rng.integers(0, self.width, n), rng.integers(0, self.height, n)
+        self.scatter_disks(xs, ys, CellState.STONE, 8, density=0.7)
+
+    def initialize_random(self):
+        # Random initialization for quick start
+        n = self.per_area(3000)
+        xs, ys = self.rng.integers(0, self.width, n), self.rng.integers(0, self.height, n)
+        self.grid[ys, xs] = self.rng.integers(1, len(CellState), n)  # Exclude EMPTY
+
+    def create_blob(self, x, y, cell_type, size):
+        self.scatter_disks([x], [y], cell_type, size, density=0.7)
+
+    def scatter_disks(self, xs, ys, cell_type, radius, density=1.0, inclusive=False):
+        """Write a disk of cell_type around every (x, y) in one scattered write
+
+        With density below 1 each cell is kept at random, giving organic shapes.
+        Where disks overlap the later one wins, as with drawing them in turn.
+        """
+        dy, dx = disk_offsets(radius, inclusive)
+        ny = (np.asarray(ys)[:, None] + dy).ravel()
+        nx = (np.asarray(xs)[:, None] + dx).ravel()
+        keep = (nx >= 0) & (nx < self.width) & (ny >= 0) & (ny < self.height)
+        if density < 1:
+            keep &= self.rng.random(keep.shape) < density
+        self.changes()
+        self.grid[ny[keep], nx[keep]] = cell_type
+        self.edits += 1
+
+    def bands(self):
+        """Row ranges the grid is split into for concurrent stepping"""
+        edges = list(range(0, self.height, self.band_height)) + [self.height]
+        return list(zip(edges[:-1], edges[1:]))
+
+    def set_threads(self, threads):
+        """Change how many worker threads step the bands"""
+        if self.pool is not None:
+            self.pool.shutdown()
+        self.threads = max(1, threads)
+        self.pool = ThreadPoolExecutor(self.threads) if self.threads > 1 else None
+
+    def run_bands(self, func, bands):
+        if self.pool is None:
+            for r0, r1 in bands:
+                func(r0, r1)
+        else:
+            # Consume the results so worker exceptions are raised here
+            list(self.pool.map(lambda band: func(*band), bands))
+
+    def step_once(self):
+        old_grid, new_grid = self.grid, self.back
+        np.copyto(new_grid, old_grid)
+        self.rolls = draw_rolls(self.rng, self.height, self.width, self.rolls)
+        done = self.done
+        done.fill(False)
+        bands, even, odd = self.band_passes
+        
+        # Reactions only write their own band, so every band runs at once
+        self.run_bands(lambda r0, r1: self.react_band(old_grid, new_grid, r0, r1), bands)
+        
+        # Particles move at most one row down, into the first row of the next
+        # band, so bands two apart never touch: step even bands, then odd ones
+        move = lambda r0, r1: self.move_band(new_grid, done, r0, r1)
+        self.run_bands(move, even)
+        self.run_bands(move, odd)
+        
+        np.not_equal(new_grid, old_grid, out=self.flips)
+        self.changed = int(np.count_nonzero(self.flips))
+        self.change_set = None
+        self.grid, self.back = new_grid, old_grid
+
+    def react_band(self, old_grid, new_grid, r0, r1):
+        """Plant growth, burning and burnout for rows r0..r1, read from the old grid"""
+        rows, width = r1 - r0, self.width
+        scratch = self.scratch[r0, r1]
+        
+        # Band plus a one-cell border of the neighboring bands' rows; the border
+        # past the edges of the world is never written, so it stays EMPTY
+        top, bottom = max(r0 - 1, 0), min(r1 + 1, self.height)
+        slab, hits = scratch['slab'], scratch['hits']
+        np.copyto(slab[top - r0 + 1:bottom - r0 + 1, 1:-1], old_grid[top:bottom])
+        
+        cells = old_grid[r0:r1]
+        out = new_grid[r0:r1]
+        roll = {name: values[r0:r1] for name, values in self.rolls.items()}
+        counts, index, chance, mask = scratch['counts'], scratch['index'], scratch['chance'], scratch['mask']
+        
+        # Plants catch fire when near lava or fire, and each burning neighbor
+        # gets its own chance to spread to them
+        plant = matches(cells, CellState.PLANT, scratch['plant'])
+        fires = count_neighbors(matches(slab, CellState.FIRE, hits), rows, width, scratch['fires'])
+        count_neighbors(matches(slab, CellState.LAVA, hits), rows, width, counts)
+        np.add(fires, counts, out=counts)
+        hot = np.greater(counts, 0, out=scratch['hot'])
+        np.logical_and(hot, np.less(roll['ignite'], 0.3, out=mask), out=hot)
+        np.copyto(index, fires)
+        np.take(SPREAD_CHANCE, index, out=chance, mode='clip')
+        np.logical_or(hot, np.less(roll['spread'], chance, out=mask), out=hot)
+        put(out, CellState.FIRE, np.logical_and(plant, hot, out=mask))
+        
+        # Fire is put out by water, otherwise it may turn to smoke (empty)
+        count_neighbors(matches(slab, CellState.WATER, hits), rows, width, counts)
+        wet = np.greater(counts, 0, out=scratch['wet'])
+        np.logical_or(wet, np.less(roll['burnout'], 0.1, out=mask), out=wet)
+        put(out, CellState.EMPTY, np.logical_and(wet, matches(cells, CellState.FIRE, mask), out=mask))
+        
+        # Plants grow upward and to the sides: an empty cell sprouts from the
+        # plant below it, or from plants beside it unless they are in the top row
+        parent = matches(slab, CellState.PLANT, hits)
+        parents = np.add(parent[1:-1, :-2], parent[1:-1, 2:], out=counts, dtype=np.uint8)
+        if r0 == 0:
+            parents[0] = 0
+        np.add(parents, parent[2:, 1:-1], out=parents)
+        np.copyto(index, parents)
+        np.take(GROW_CHANCE, index, out=chance, mode='clip')
+        grow = np.less(roll['grow'], chance, out=scratch['plant'])
+        np.logical_and(grow, matches(cells, CellState.EMPTY, mask), out=grow)
+        put(out, CellState.PLANT, grow)
+
+    def move_band(self, grid, done, r0, r1):
+        """Let sand, lava and water in rows r0..r1 fall or flow, bottom row first"""
+        scratch = self.scratch[r0, r1]
+        # Rows two apart cannot interact, so each parity is one vectorized pass
+        first = r0 + (r1 - 1 - r0) % 2
+        for start in (first, first + 1 if first == r0 else first - 1):
+            if start >= r1:
+                continue
+            rows = slice(start, r1, 2)
+            cur, cur_done = grid[rows], done[rows]
+            roll = {name: values[rows] for name, values in self.rolls.items()}
+            
+            # The last grid row has nothing below it, but water can still spread
+            stop = min(r1, self.height - 1)
+            if start < stop:
+                fall = slice(0, len(range(start, stop, 2)))
+                below = slice(start + 1, stop + 1, 2)
+                self.move_granular(cur[fall], cur_done[fall], grid[below], done[below],
+                                   roll['order'][fall], scratch)
+                self.move_water(cur[fall], cur_done[fall], grid[below], done[below],
+                                roll['fall_side'][fall], scratch)
+            self.flow_water(cur, cur_done, roll['flow_side'], scratch)
+
+    def move_granular(self, cur, cur_done, below, below_done, order, scratch):
+        # Sand and lava fall down or diagonally, trying directions in rolled order
+        for k in range(3):
+            for dx in (-1, 0, 1):
+                src, src_done = shift_src(cur, dx), shift_src(cur_done, dx)
+                dst, dst_done = shift_dst(below, dx), shift_dst(below_done, dx)
+                free, sand, lava, flow, quench, moved, test = (
+                    fit(scratch[name], src) for name in ('free', 'sand', 'lava', 'flow', 'quench', 'moved', 'test'))
+                
+                # Cells not yet moved whose rolled order tries dx at this step
+                first, second = ORDERS_TRYING[k][dx + 1]
+                np.equal(shift_src(order, dx), first, out=free)
+                np.logical_or(free, np.equal(shift_src(order, dx), second, out=test), out=free)
+                np.logical_and(free, np.logical_not(src_done, out=test), out=free)
+                
+                # Sand sinks through water by swapping places with it. The water
+                # is put back by mask, as copying between two views of the grid
+                # would go through a temporary copy
+                matches(dst, CellState.EMPTY, sand)
+                sinks = matches(dst, CellState.WATER, test)
+                np.logical_or(sand, sinks, out=sand)
+                np.logical_and(sand, matches(src, CellState.SAND, moved), out=sand)
+                np.logical_and(sand, free, out=sand)
+                np.logical_and(sinks, sand, out=sinks)
+                put(src, CellState.EMPTY, sand)
+                put(src, CellState.WATER, sinks)
+                put(dst, CellState.SAND, sand)
+                
+                # Lava flows into empty cells, turns to stone with water and
+                # sets plants on fire without stopping
+                np.logical_and(free, matches(src, CellState.LAVA, test), out=lava)
+                np.logical_and(lava, matches(dst, CellState.EMPTY, test), out=flow)
+                np.logical_and(lava, matches(dst, CellState.WATER, test), out=quench)
+                put(dst, CellState.LAVA, flow)
+                put(src, CellState.EMPTY, flow)
+                put(src, CellState.STONE, quench)
+                put(dst, CellState.STONE, quench)
+                put(dst, CellState.FIRE, np.logical_and(lava, matches(dst, CellState.PLANT, test), out=test))
+                
+                np.logical_or(sand, flow, out=moved)
+                np.logical_or(moved, quench, out=moved)
+                np.logical_or(src_done, moved, out=src_done)
+                np.logical_or(dst_done, moved, out=dst_done)
+
+    def move_water(self, cur, cur_done, below, below_done, fall_side, scratch):
+        # Water falls straight down, then diagonally with the rolled side first
+        for dx, side in ((0, None), (-1, 0), (1, 1), (-1, 1), (1, 0)):
+            src, src_done = shift_src(cur, dx), shift_src(cur_done, dx)
+            dst, dst_done = shift_dst(below, dx), shift_dst(below_done, dx)
+            moved, test = fit(scratch['moved'], src), fit(scratch['test'], src)
+            np.logical_not(src_done, out=moved)
+            np.logical_and(moved, matches(src, CellState.WATER, test), out=moved)
+            np.logical_and(moved, matches(dst, CellState.EMPTY, test), out=moved)
+            if side is not None:
+                np.logical_and(moved, np.equal(shift_src(fall_side, dx), side, out=test), out=moved)
+            put(dst, CellState.WATER, moved)
+            put(src, CellState.EMPTY, moved)
+            np.logical_or(src_done, moved, out=src_done)
+            np.logical_or(dst_done, moved, out=dst_done)
+
+    def flow_water(self, cur, cur_done, flow_side, scratch):
+        # Water that could not fall spreads sideways, rolled side first
+        for dx, side in ((-1, 0), (1, 1), (-1, 1), (1, 0)):
+            src, src_done = shift_src(cur, dx), shift_src(cur_done, dx)
+            dst, dst_done = shift_dst(cur, dx), shift_dst(cur_done, dx)
+            moved, test = fit(scratch['moved'], src), fit(scratch['test'], src)
+            np.equal(shift_src(flow_side, dx), side, out=moved)
+            np.logical_and(moved, np.logical_not(src_done, out=test), out=moved)
+            np.logical_and(moved, matches(src, CellState.WATER, test), out=moved)
+            np.logical_and(moved, matches(dst, CellState.EMPTY, test), out=moved)
+            put(dst, CellState.WATER, moved)
+            put(src, CellState.EMPTY, moved)
+            np.logical_or(src_done, moved, out=src_done)
+            np.logical_or(dst_done, moved, out=dst_done)
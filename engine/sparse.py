@@ -0,0 +1,61 @@
+import itertools
+
+import numpy as np
+
+from .core import NO_CELLS, Simulation
+
+class SparseSimulation(Simulation):
+    """Only the live cells are stored, as sorted flat indices into the board
+
+    Each step looks at live cells and their neighbors only, so the cost
+    follows the population rather than the board size. Rules that give
+    birth with zero neighbors (B0) are not supported.
+    """
+    def __init__(self, shape, rule='B3/S23', wrap=False, seed=None):
+        super().__init__(shape, rule, wrap, seed)
+        if 0 in self.rule.birth:
+            raise ValueError("The sparse backend cannot run B0 rules")
+        self.table = self.rule.table(3 ** len(self.shape) - 1)
+        # Includes the zero offset, so every live cell is a candidate
+        self.offsets = np.array(list(itertools.product((-1, 0, 1), repeat=len(self.shape))))
+        self.live = np.empty(0, dtype=np.int64)
+
+    def step_once(self):
+        if len(self.live) == 0:
+            self.set_changes(NO_CELLS, NO_CELLS)
+            return
+        
+        coords = np.stack(np.unravel_index(self.live, self.shape), axis=1)
+        candidates = (coords[:, None, :] + self.offsets[None, :, :]).reshape(-1, len(self.shape))
+        if self.wrap:
+            candidates %= self.shape
+        else:
+            candidates = candidates[((candidates >= 0) & (candidates < self.shape)).all(axis=1)]
+        
+        cells, counts = np.unique(np.ravel_multi_index(candidates.T, self.shape), return_counts=True)
+        alive = np.isin(cells, self.live, assume_unique=True)
+        # Live cells were counted once through the zero offset
+        counts -= alive
+        new_live = cells[self.table[alive.astype(np.uint8), counts] == 1]
+        
+        self.set_changes(np.setdiff1d(new_live, self.live, assume_unique=True),
+                         np.setdiff1d(self.live, new_live, assume_unique=True))
+        self.live = new_live
+
+    @property
+    def state(self):
+        # A fresh array: writes to it do not change the board
+        cells = np.zeros(self.shape, dtype=np.uint8)
+        cells.flat[self.live] = 1
+        return cells
+
+    def load(self, cells):
+        cells = np.asarray(cells)
+        if cells.shape != self.shape:
+            raise ValueError(f"Expected cells of shape {self.shape}, got {cells.shape}")
+        self.live = np.flatnonzero(cells).astype(np.int64)
+        self.edits += 1
+
+    @property
+    def population(self):
+        return len(self.live)
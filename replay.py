@@ -0,0 +1,75 @@
+"""Play back and scrub through a recording made by 2D.py, 3D.py or cell.py
+
+    python replay.py run_cell.rec
+    python replay.py run_2d.rec --start 500 --fps 60
+
+The trackbar seeks to any frame. SPACE plays and pauses, A and D step one
+frame back and forward, ESC quits. Boards with more than two dimensions are
+shown projected along their first axis.
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from engine import Replay
+
+WINDOW = "Replay"
+VIEW_SIZE = 800
+
+def to_image(cells, palette):
+    while cells.ndim > 2:
+        cells = cells.max(axis=0)
+    img = palette[cells]
+    scale = max(1, VIEW_SIZE // max(cells.shape))
+    return cv2.resize(img, (cells.shape[1] * scale, cells.shape[0] * scale), interpolation=cv2.INTER_NEAREST)
+
+def main():
+    parser = argparse.ArgumentParser(description="Play back a simulation recording")
+    parser.add_argument('path')
+    parser.add_argument('--start', type=int, default=0, help="Frame to start on")
+    parser.add_argument('--fps', type=float, default=30)
+    args = parser.parse_args()
+
+    replay = Replay(args.path)
+    if not len(replay):
+        raise SystemExit(f"{args.path} has no frames")
+    # cell.py stores its material colors; live/dead boards are white on black
+    palette = np.array(replay.meta.get('palette', [(0, 0, 0), (255, 255, 255)]), dtype=np.uint8)
+
+    state = {'index': min(args.start, len(replay) - 1), 'playing': True}
+    def on_trackbar(position):
+        state['index'] = position
+    cv2.namedWindow(WINDOW)
+    cv2.createTrackbar('frame', WINDOW, state['index'], len(replay) - 1, on_trackbar)
+
+    while True:
+        start = time.perf_counter()
+        cells = replay.seek(state['index'])
+        seek_ms = (time.perf_counter() - start) * 1000
+
+        img = to_image(cells, palette)
+        text = (f"frame {state['index']}/{len(replay) - 1}  generation {replay.generations[state['index']]}"
+                f"  seek {seek_ms:.2f} ms")
+        cv2.putText(img, text, (10, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        cv2.imshow(WINDOW, img)
+
+        key = cv2.waitKey(max(1, int(1000 / args.fps))) & 0xFF
+        if key == 27:  # ESC
+            break
+        elif key == ord(' '):
+            state['playing'] = not state['playing']
+        elif key == ord('a'):
+            state['index'] = max(0, state['index'] - 1)
+        elif key == ord('d'):
+            state['index'] = min(len(replay) - 1, state['index'] + 1)
+        elif state['playing'] and state['index'] < len(replay) - 1:
+            state['index'] += 1
+        cv2.setTrackbarPos('frame', WINDOW, state['index'])
+
+    replay.close()
+    cv2.destroyAllWindows()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Run many headless simulations across a process pool
+
+    python sweep.py --rules B3/S23 B36/S23 --sizes 64 128 --densities 0.15 0.3 --seeds 0-9
+    python sweep.py --dims 3 --sizes 12 --rules B3/S2345 B4/S3456 --densities 0.15 \\
+        --seeds 0-19 --generations 500 --time-limit 30 --memory-limit 512 --output 3d.jsonl
+
+Every combination of rule, size, density and seed becomes one job. A job
+stops early when the board dies out or repeats an earlier state, and when it
+runs past its time limit (checked between generations) or its memory limit
+(an address space cap on the worker). Each finished job is written straight
+away as one compact JSON line: the parameters, the outcome, the period of the
+cycle it settled into, its runtime and a downsampled population curve.
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from engine import make_simulation
+
+try:
+    import resource
+except ImportError:  # Windows has no rlimits, so memory limits are not enforced there
+    resource = None
+
+def parse_shape(size, dims):
+    """'64' -> (64, 64) for dims=2, '64x32' -> (64, 32)"""
+    if 'x' in size:
+        return tuple(int(n) for n in size.split('x'))
+    return (int(size),) * dims
+
+def parse_seeds(specs):
+    """Seeds from a mix of single values and inclusive ranges like 0-9"""
+    seeds = []
+    for spec in specs:
+        first, _, last = spec.partition('-')
+        seeds.extend(range(int(first), int(last or first) + 1))
+    return seeds
+
+def make_jobs(args):
+    shapes = [parse_shape(size, args.dims) for size in args.sizes]
+    for rule, shape, density, seed in itertools.product(args.rules, shapes, args.densities, parse_seeds(args.seeds)):
+        yield {
+            'rule': rule,
+            'shape': shape,
+            'density': density,
+            'seed': seed,
+            'backend': args.backend,
+            'wrap': len(shape) == 2 if args.wrap is None else args.wrap,
+            'max_generations': args.generations,
+        }
+
+def limit_memory(megabytes):
+    """Cap this process' address space at its current size plus the given budget
+
+    Returns the previous limits so the worker can restore them for its next job.
+    """
+    if resource is None or not megabytes:
+        return None
+    try:
+        with open('/proc/self/statm') as f:
+            current = int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        current = 0
+    previous = resource.getrlimit(resource.RLIMIT_AS)
+    hard = previous[1]
+    limit = current + megabytes * 2**20
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    return previous
+
+def downsample(curve, points):
+    """At most the given number of evenly spaced values, always keeping the last"""
+    if not points or len(curve) <= points:
+        return curve
+    picks = np.linspace(0, len(curve) - 1, points).round().astype(int)
+    return [curve[i] for i in picks]
+
+def run_job(job, time_limit=None, memory_limit=None, curve_points=200):
+    """Run one simulation until it dies out, cycles or hits a limit"""
+    previous_limits = limit_memory(memory_limit)
+    start = time.perf_counter()
+    deadline = start + time_limit if time_limit else None
+    curve = []
+    seen = {}  # Hash of each board state -> first generation it appeared in
+    outcome, period = 'unsettled', None
+
+    try:
+        simulation = make_simulation(job['backend'], job['shape'], job['rule'], job['wrap'], job['seed'])
+        simulation.randomize(job['density'])
+        while True:
+            state = simulation.state
+            population = int(np.count_nonzero(state))
+            curve.append(population)
+            if population == 0:
+                outcome, period = 'extinct', 1
+                break
+            key = hash(state.tobytes())
+            first = seen.setdefault(key, simulation.generation)
+            if first != simulation.generation:
+                outcome, period = 'cycle', simulation.generation - first
+                break
+            if simulation.generation >= job['max_generations']:
+                break
+            if deadline and time.perf_counter() > deadline:
+                outcome = 'timeout'
+                break
+            simulation.step()
+    except MemoryError:
+        outcome = 'memory'
+    except Exception as exc:
+        outcome = f'error: {exc}'
+    finally:
+        if previous_limits:
+            resource.setrlimit(resource.RLIMIT_AS, previous_limits)
+
+    result = dict(job)
+    result.update({
+        'outcome': outcome,
+        'period': period,
+        'generations': max(len(curve) - 1, 0),
+        'final_population': curve[-1] if curve else None,
+        'runtime': round(time.perf_counter() - start, 4),
+        'curve': downsample(curve, curve_points),
+    })
+    return result
+
+def sweep(jobs, output, workers=None, time_limit=None, memory_limit=None, curve_points=200):
+    """Run jobs across a process pool, appending each result to output as it finishes"""
+    counts = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(output, 'a') as f:
+        futures = [pool.submit(run_job, job, time_limit, memory_limit, curve_points) for job in jobs]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            f.write(json.dumps(result, separators=(',', ':')) + '\n')
+            f.flush()
+
+            outcome = result['outcome'].split(':')[0]
+            counts[outcome] = counts.get(outcome, 0) + 1
+            period = f" period {result['period']}" if result['period'] else ''
+            print(f"[{done}/{len(futures)}] {result['rule']} {'x'.join(map(str, result['shape']))} "
+                  f"density {result['density']} seed {result['seed']}: {result['outcome']}{period} "
+                  f"after {result['generations']} generations, {result['runtime']:.2f} s")
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep rules, sizes, densities and seeds across a process pool")
+    parser.add_argument('--rules', nargs='+', default=['B3/S23'])
+    parser.add_argument('--sizes', nargs='+', default=['64'], help="Edge length, or a full shape like 64x32")
+    parser.add_argument('--dims', type=int, default=2, help="Dimensions for sizes given as one number")
+    parser.add_argument('--densities', nargs='+', type=float, default=[0.15])
+    parser.add_argument('--seeds', nargs='+', default=['0-9'], help="Seeds and inclusive ranges like 0-9")
+    parser.add_argument('--backend', default='dense')
+    parser.add_argument('--wrap', action=argparse.BooleanOptionalAction, default=None,
+                        help="Wrap around the edges (default: only for 2D)")
+    parser.add_argument('--generations', type=int, default=1000, help="Stop unsettled runs after this many")
+    parser.add_argument('--time-limit', type=float, default=None, help="Seconds per job")
+    parser.add_argument('--memory-limit', type=int, default=None, help="Extra megabytes per job")
+    parser.add_argument('--curve-points', type=int, default=200, help="Population samples kept per job (0 keeps all)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default='sweep.jsonl', help="Results are appended here, one JSON line per job")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = sweep(list(make_jobs(args)), args.output, args.workers, args.time_limit,
+                   args.memory_limit, args.curve_points)
+    print(f"{sum(counts.values())} jobs in {time.perf_counter() - start:.1f} s: "
+          + ', '.join(f"{n} {outcome}" for outcome, n in sorted(counts.items())))
+    print(f"Results appended to {args.output}")
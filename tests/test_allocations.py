@@ -0,0 +1,59 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from engine import make_simulation
+from engine.sandbox import Sandbox
+
+# numpy runs ufuncs over non-contiguous views (box sums, shifted masks, the
+# sandbox's every-other-row passes) through iteration buffers of
+# np.getbufsize() elements per operand. They are the only arrays a step may
+# allocate, and they do not grow with the board. Every buffered operand
+# below has one-byte elements.
+BUFFER = np.getbufsize()
+
+# Python objects a step makes on the way: views, index tuples, the
+# sandbox's per-band roll dicts
+OVERHEAD = 8 * 1024
+
+def step_peak(step):
+    """Peak bytes traced while taking one step, after the lazily made buffers have settled"""
+    step()
+    step()
+    tracemalloc.start()
+    try:
+        step()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def life(backend, dims):
+    def make(size):
+        edge = size if dims == 2 else round(size ** (2 / 3))
+        simulation = make_simulation(backend, (edge,) * dims, 'B3/S23' if dims == 2 else 'B3/S2345',
+                                     wrap=True, seed=0)
+        simulation.randomize(0.5)
+        return simulation.step
+    return make
+
+def sandbox(size):
+    return Sandbox(size, size, seed=0).step
+
+CASES = {
+    # Box sums add two shifted views at a time
+    'dense 2d': (life('dense', 2), 2 * BUFFER),
+    'dense 3d': (life('dense', 3), 2 * BUFFER),
+    'chunked': (life('chunked', 2), 2 * BUFFER),
+    # The popcount's uint8 results are buffered on their way into uint64 counts
+    'packed': (life('packed', 2), BUFFER),
+    # Masks over every other row of a band combine three views
+    'sandbox': (sandbox, 3 * BUFFER),
+}
+
+@pytest.mark.parametrize('size', [256, 1024])
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_step_allocates_only_fixed_buffers(name, size):
+    make, buffers = CASES[name]
+    peak = step_peak(make(size))
+    assert peak <= buffers + OVERHEAD, f"{name} step at size {size} allocated {peak} bytes"
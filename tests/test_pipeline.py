@@ -0,0 +1,48 @@
+import threading
+
+import pytest
+
+cv = pytest.importorskip('cv')
+
+class StopAfter:
+    """Sink that asks the pipeline to stop after a few frames (None for never)"""
+    def __init__(self, frames=None):
+        self.frames = frames
+        self.written = 0
+        self.closed = False
+
+    def write(self, frame):
+        self.written += 1
+        return self.frames is None or self.written < self.frames
+
+    def close(self):
+        self.closed = True
+
+@pytest.mark.parametrize('drop', [False, True])
+def test_early_stop_does_not_hang(drop):
+    # The drain used to take the capture thread's end marker, leaving the
+    # effect thread waiting for it forever
+    for _ in range(30):
+        sink = StopAfter(3)
+        pipeline = cv.Pipeline(cv.SyntheticSource(64, 48), sink, drop=drop)
+        runner = threading.Thread(target=pipeline.run, daemon=True)
+        runner.start()
+        runner.join(timeout=5)
+        assert not runner.is_alive(), "pipeline did not stop"
+        assert sink.written == 3
+        assert sink.closed
+
+def test_lossless_pipeline_keeps_every_frame():
+    sink = StopAfter()
+    stats = cv.Pipeline(cv.SyntheticSource(64, 48, frames=60), sink, drop=False).run()
+    assert sink.written == 60
+    assert stats['dropped_captured'] == stats['dropped_processed'] == 0
+
+def test_stage_timings_reach_the_sink_profiler(monkeypatch):
+    profiler = cv.Profiler(enabled=True)
+    monkeypatch.setattr(cv, 'profiler', profiler)
+    cv.Pipeline(cv.SyntheticSource(64, 48, frames=20), StopAfter(), drop=False).run()
+    assert len(profiler.samples) == 20
+    for sample in profiler.samples:
+        assert {'capture', 'effect', 'sink'} <= sample.keys()
+    assert {'capture', 'effect', 'sink'} <= profiler.timers.keys()
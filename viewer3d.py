@@ -0,0 +1,371 @@
+"""OpenGL viewer for 3D simulations, used by 3D.py"""
+import pygame
+import numpy as np
+from pygame.locals import *
+from OpenGL.GL import *
+from OpenGL.GLU import *
+
+from engine import Profiler, Recorder, StatsCollector
+from engine.core import NO_CELLS
+
+width, height = 1000, 700
+CELL_SIZE = 1.0
+
+# Colors
+BACKGROUND = (0.1, 0.1, 0.15, 1.0)
+GRID_COLOR = (0.2, 0.2, 0.3, 0.6)
+ALIVE_COLOR = (0.2, 0.8, 0.6, 1.0)
+NEW_CELL_COLOR = (0.9, 0.4, 0.2, 1.0)
+DYING_CELL_COLOR = (0.6, 0.1, 0.4, 1.0)
+UI_COLOR = (0.9, 0.9, 1.0, 1.0)
+
+# Camera settings
+camera_distance = 25.0
+camera_x, camera_y = 0, 0
+rotation_x, rotation_y = 30, 30
+dragging = False
+last_mouse_x, last_mouse_y = 0, 0
+
+# Simulation control
+paused = False
+generation_time = 0.5
+last_update = 0
+simulation = None
+density = 0.15
+GRID_SIZE = 0
+recorder = None
+stats = None
+
+# Flat indices of the cells born and died in the last generation, drawn in
+# their own colors, and of the live cells, kept up to date from them
+births = NO_CELLS
+deaths = NO_CELLS
+live = NO_CELLS
+live_stamp = None
+
+# Instrumentation: I shows phase timings under the controls (turning the
+# timers on if PROFILE is off), O runs cProfile for PROFILE_FRAMES frames,
+# D dumps the recent frame samples
+PROFILE = False
+PROFILE_FRAMES = 100
+PROFILE_STATS = 'profile_3d.prof'
+PROFILE_DUMP = 'profile_3d.json'
+profiler = Profiler(enabled=PROFILE)
+overlay = False
+
+def live_cells():
+    """Flat indices of the live cells, folded in from each generation's change set
+
+    Only edits, which come without a change set, rescan the whole volume.
+    """
+    global live, live_stamp
+    if simulation.stamp != live_stamp:
+        if simulation.delta_applies(live_stamp):
+            live = np.union1d(np.setdiff1d(live, simulation.deaths, assume_unique=True), simulation.births)
+        else:
+            live = np.flatnonzero(simulation.state)
+        live_stamp = simulation.stamp
+    return live
+
+def update_grid():
+    """Advance one generation, keeping track of newborn and dying cells"""
+    global births, deaths
+    if paused:
+        return
+    
+    # The step reports its own births and deaths, so no diff of the boards
+    simulation.step()
+    births, deaths = simulation.births, simulation.deaths
+    live_cells()
+    if recorder:
+        with profiler.timer('record'):
+            recorder.capture()
+    
+    # If no changes, randomize to avoid stagnation
+    if simulation.changed == 0:
+        simulation.add_noise(0.01)
+
+def draw_cube(x, y, z, state):
+    """Draw a cube at the given position"""
+    # Define cube vertices
+    s = CELL_SIZE / 2
+    vertices = [
+        [x-s, y-s, z-s], [x+s, y-s, z-s], [x+s, y+s, z-s], [x-s, y+s, z-s],
+        [x-s, y-s, z+s], [x+s, y-s, z+s], [x+s, y+s, z+s], [x-s, y+s, z+s]
+    ]
+    
+    # Define cube faces
+    faces = [
+        [0, 1, 2, 3], [3, 2, 6, 7], [7, 6, 5, 4],
+        [4, 5, 1, 0], [0, 3, 7, 4], [1, 5, 6, 2]
+    ]
+    
+    # Set color based on cell state
+    if state == 1:  # Alive
+        color = ALIVE_COLOR
+    elif state == 2:  # Newborn
+        color = NEW_CELL_COLOR
+    elif state == -1:  # Dying
+        color = DYING_CELL_COLOR
+    else:
+        return
+    
+    # Draw the cube
+    glBegin(GL_QUADS)
+    glColor4f(*color)
+    for face in faces:
+        for vertex in face:
+            glVertex3f(vertices[vertex][0], vertices[vertex][1], vertices[vertex][2])
+    glEnd()
+
+def draw_grid_lines():
+    """Draw the grid lines for reference"""
+    glBegin(GL_LINES)
+    glColor4f(*GRID_COLOR)
+    
+    # Draw grid lines
+    for i in range(GRID_SIZE + 1):
+        offset = i - GRID_SIZE/2
+        # X-axis lines
+        glVertex3f(offset, -GRID_SIZE/2, -GRID_SIZE/2)
+        glVertex3f(offset, -GRID_SIZE/2, GRID_SIZE/2)
+        glVertex3f(offset, GRID_SIZE/2, -GRID_SIZE/2)
+        glVertex3f(offset, GRID_SIZE/2, GRID_SIZE/2)
+        
+        # Y-axis lines
+        glVertex3f(-GRID_SIZE/2, offset, -GRID_SIZE/2)
+        glVertex3f(GRID_SIZE/2, offset, -GRID_SIZE/2)
+        glVertex3f(-GRID_SIZE/2, offset, GRID_SIZE/2)
+        glVertex3f(GRID_SIZE/2, offset, GRID_SIZE/2)
+        
+        # Z-axis lines
+        glVertex3f(-GRID_SIZE/2, -GRID_SIZE/2, offset)
+        glVertex3f(GRID_SIZE/2, -GRID_SIZE/2, offset)
+        glVertex3f(-GRID_SIZE/2, GRID_SIZE/2, offset)
+        glVertex3f(GRID_SIZE/2, GRID_SIZE/2, offset)
+    
+    glEnd()
+
+def draw_ui():
+    """Draw UI elements on screen"""
+    # Switch to 2D projection for UI
+    glMatrixMode(GL_PROJECTION)
+    glPushMatrix()
+    glLoadIdentity()
+    gluOrtho2D(0, width, height, 0)
+    glMatrixMode(GL_MODELVIEW)
+    glPushMatrix()
+    glLoadIdentity()
+    
+    # Disable depth test for UI
+    glDisable(GL_DEPTH_TEST)
+    
+    sample = stats.sample()
+    texts = [
+        f"Generation: {simulation.generation}",
+        f"Grid: {'x'.join(map(str, simulation.shape))}",
+        f"Live: {sample['population']} (+{sample['births']} -{sample['deaths']})",
+        "Controls:",
+        "P - Pause/Resume simulation",
+        "R - Reset grid",
+        "C - Clear grid",
+        "Mouse - Rotate view",
+        "Wheel - Zoom in/out",
+        "Arrow keys - Move view",
+        "I - Timings, O - cProfile, D - Dump"
+    ]
+    if overlay:
+        texts += profiler.summary_lines()
+    bottom = 30 + len(texts) * 25
+    
+    # Draw semi-transparent background for UI
+    glBegin(GL_QUADS)
+    glColor4f(0.1, 0.1, 0.15, 0.7)
+    glVertex2f(10, 10)
+    glVertex2f(300, 10)
+    glVertex2f(300, bottom + 25)
+    glVertex2f(10, bottom + 25)
+    glEnd()
+    
+    # Draw UI text
+    font = pygame.font.SysFont('Arial', 20)
+    
+    # Draw each line of text
+    for i, text in enumerate(texts):
+        text_surface = font.render(text, True, UI_COLOR)
+        text_data = pygame.image.tostring(text_surface, "RGBA", True)
+        glRasterPos2f(20, 30 + i*25)
+        glDrawPixels(text_surface.get_width(), text_surface.get_height(), 
+                     GL_RGBA, GL_UNSIGNED_BYTE, text_data)
+    
+    # Draw status
+    status = "PAUSED" if paused else "RUNNING"
+    status_color = (1.0, 0.3, 0.3, 1.0) if paused else (0.3, 1.0, 0.5, 1.0)
+    status_surface = font.render(f"Status: {status}", True, status_color)
+    status_data = pygame.image.tostring(status_surface, "RGBA", True)
+    glRasterPos2f(20, bottom)
+    glDrawPixels(status_surface.get_width(), status_surface.get_height(), 
+                 GL_RGBA, GL_UNSIGNED_BYTE, status_data)
+    
+    # Restore 3D settings
+    glEnable(GL_DEPTH_TEST)
+    glMatrixMode(GL_PROJECTION)
+    glPopMatrix()
+    glMatrixMode(GL_MODELVIEW)
+    glPopMatrix()
+
+def setup_perspective():
+    """Set up the perspective projection"""
+    glMatrixMode(GL_PROJECTION)
+    glLoadIdentity()
+    gluPerspective(45, (width / height), 0.1, 100.0)
+    glMatrixMode(GL_MODELVIEW)
+    glLoadIdentity()
+
+def handle_input():
+    """Handle keyboard and mouse input"""
+    global paused, camera_distance, rotation_x, rotation_y, camera_x, camera_y, generation_time
+    global births, deaths, overlay
+    
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            if recorder:
+                recorder.close()
+                print(f"Recorded {recorder.frames} frames, {recorder.bytes_per_frame:.0f} bytes per frame")
+            pygame.quit()
+            quit()
+        
+        # Keyboard events
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_p:
+                paused = not paused
+            elif event.key == pygame.K_r:
+                simulation.randomize(density)
+                births, deaths = NO_CELLS, NO_CELLS
+            elif event.key == pygame.K_c:
+                simulation.clear()
+                births, deaths = NO_CELLS, NO_CELLS
+            elif event.key == pygame.K_UP:
+                camera_y += 1
+            elif event.key == pygame.K_DOWN:
+                camera_y -= 1
+            elif event.key == pygame.K_LEFT:
+                camera_x -= 1
+            elif event.key == pygame.K_RIGHT:
+                camera_x += 1
+            elif event.key == pygame.K_PLUS or event.key == pygame.K_EQUALS:
+                generation_time = max(0.1, generation_time - 0.1)
+            elif event.key == pygame.K_MINUS:
+                generation_time += 0.1
+            elif event.key == pygame.K_i:
+                overlay = not overlay
+                profiler.enabled = overlay or PROFILE
+            elif event.key == pygame.K_o:
+                profiler.profile_frames(PROFILE_FRAMES, PROFILE_STATS)
+            elif event.key == pygame.K_d:
+                profiler.dump(PROFILE_DUMP)
+        
+        # Mouse events
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button == 1:  # Left button
+                global dragging, last_mouse_x, last_mouse_y
+                dragging = True
+                last_mouse_x, last_mouse_y = event.pos
+            elif event.button == 4:  # Scroll up
+                camera_distance = max(10, camera_distance - 1)
+            elif event.button == 5:  # Scroll down
+                camera_distance = min(50, camera_distance + 1)
+        
+        elif event.type == pygame.MOUSEBUTTONUP:
+            if event.button == 1:  # Left button
+                dragging = False
+        
+        elif event.type == pygame.MOUSEMOTION and dragging:
+            dx, dy = event.pos[0] - last_mouse_x, event.pos[1] - last_mouse_y
+            rotation_y += dx * 0.3
+            rotation_x += dy * 0.3
+            rotation_x = max(-90, min(90, rotation_x))  # Clamp vertical rotation
+            last_mouse_x, last_mouse_y = event.pos
+
+def draw_scene():
+    """Draw the grid, the live and dying cells and the UI, then flip"""
+    # Clear screen
+    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+    
+    # Set up camera
+    setup_perspective()
+    glLoadIdentity()
+    glTranslatef(0, 0, -camera_distance)
+    glRotatef(rotation_x, 1, 0, 0)
+    glRotatef(rotation_y, 0, 1, 0)
+    glTranslatef(camera_x, camera_y, 0)
+    
+    # Draw grid lines
+    draw_grid_lines()
+    
+    # Draw cells, only visiting the ones that are alive or just died
+    cells = live_cells()
+    newborn = np.isin(cells, births, assume_unique=True)
+    for coords, states in ((np.unravel_index(cells, simulation.shape), np.where(newborn, 2, 1)),
+                           (np.unravel_index(deaths, simulation.shape), np.full(len(deaths), -1))):
+        for x, y, z, state in zip(*coords, states):
+            # Convert grid coordinates to world coordinates
+            world_x = x - GRID_SIZE/2 + 0.5
+            world_y = y - GRID_SIZE/2 + 0.5
+            world_z = z - GRID_SIZE/2 + 0.5
+            draw_cube(world_x, world_y, world_z, state)
+    
+    # Draw UI
+    draw_ui()
+    
+    # Update display
+    pygame.display.flip()
+
+def run(sim, title, initial_density=0.15, record=None):
+    """Show a 3D simulation in an OpenGL window until it is closed,
+    recording it to the given path if there is one"""
+    global last_update, simulation, density, GRID_SIZE, births, deaths, recorder, stats
+    simulation = sim
+    stats = StatsCollector(simulation, region=None)
+    recorder = Recorder(record, simulation) if record else None
+    density = initial_density
+    GRID_SIZE = max(simulation.shape)
+    births, deaths = NO_CELLS, NO_CELLS
+    
+    # Initialize pygame
+    pygame.init()
+    pygame.display.set_mode((width, height), DOUBLEBUF | OPENGL)
+    pygame.display.set_caption(title)
+    
+    # Set up OpenGL
+    glEnable(GL_DEPTH_TEST)
+    glEnable(GL_BLEND)
+    glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+    glClearColor(*BACKGROUND)
+    
+    # Main loop
+    clock = pygame.time.Clock()
+    
+    while True:
+        current_time = pygame.time.get_ticks() / 1000.0
+        
+        # Handle input
+        with profiler.timer('input'):
+            handle_input()
+        
+        # Update grid at regular intervals
+        if current_time - last_update > generation_time:
+            with profiler.timer('step'):
+                update_grid()
+            last_update = current_time
+        
+        with profiler.timer('render'):
+            draw_scene()
+        
+        if profiler.enabled:
+            profiler.count('live', simulation.population)
+            profiler.count('changed', simulation.changed)
+            if hasattr(simulation, 'active_chunks'):
+                profiler.count('active chunks', simulation.active_chunks)
+        profiler.end_frame()
+        clock.tick(60)